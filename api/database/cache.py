@@ -0,0 +1,106 @@
+"""
+Caches em memória do processo
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_AUSENTE = object()
+
+class TTLCache:
+    """Cache LRU limitado em tamanho, com expiração por tempo e contadores de acerto/falha"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._dados: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave: Hashable, padrao: Any = None) -> Any:
+        """Retorna o valor armazenado ou `padrao` se ausente ou expirado"""
+        with self._lock:
+            item = self._dados.get(chave, _AUSENTE)
+            if item is _AUSENTE or item[0] < time.monotonic():
+                if item is not _AUSENTE:
+                    del self._dados[chave]
+                self.misses += 1
+                return padrao
+            self._dados.move_to_end(chave)
+            self.hits += 1
+            return item[1]
+
+    def set(self, chave: Hashable, valor: Any, ttl: Optional[float] = None) -> None:
+        """Armazena um valor, descartando o menos usado se o limite for atingido"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._dados[chave] = (time.monotonic() + (self.ttl if ttl is None else ttl), valor)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.maxsize:
+                self._dados.popitem(last=False)
+
+    def invalidate(self, chave: Hashable) -> None:
+        """Remove uma chave do cache"""
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def clear(self) -> None:
+        """Remove todas as chaves do cache"""
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self) -> int:
+        return len(self._dados)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna os contadores do cache"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._dados),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None
+        }
+
+# Cache de identidades (cpf -> dados de autenticação/permissão)
+identidades_cache = TTLCache(
+    maxsize=int(os.getenv('IDENTITY_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('IDENTITY_CACHE_TTL', '60'))
+)
+
+# Claims de tokens já conferidas contra o banco (cpf -> claims validadas)
+validacoes_claims_cache = TTLCache(
+    maxsize=int(os.getenv('IDENTITY_CACHE_SIZE', '10000')),
+    ttl=300
+)
+
+# Claims de tokens JWT já verificados (sha256 do token -> payload), até o exp de cada token
+tokens_cache = TTLCache(
+    maxsize=int(os.getenv('JWT_DECODE_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('JWT_DECODE_CACHE_TTL', '300'))
+)
+
+# Lançamentos de férias aprovadas por usuário (cpf -> datas e somas acumuladas)
+lancamentos_ferias_cache = TTLCache(
+    maxsize=int(os.getenv('VACATION_LEDGER_CACHE_SIZE', '10000')),
+    ttl=float(os.getenv('VACATION_LEDGER_CACHE_TTL', '300'))
+)
+
+# Dados de referência pouco mutáveis (ex.: id do tipo de ausência "Férias")
+referencias_cache = TTLCache(maxsize=64, ttl=300)
+
+def invalidar_usuario(cpf: int) -> None:
+    """Sinaliza que os dados de um usuário mudaram, descartando-o de todos os caches"""
+    identidades_cache.invalidate(cpf)
+    validacoes_claims_cache.invalidate(cpf)
+
+def invalidar_usuarios() -> None:
+    """Descarta todos os usuários dos caches (ex.: grupo mudou de empresa)"""
+    identidades_cache.clear()
+    validacoes_claims_cache.clear()
@@ -1,19 +1,202 @@
-from typing import List, Optional, Dict, Any, Union # Added Union
+from typing import List, Optional, Dict, Any, Union, Callable, Tuple, Iterator, Iterable, FrozenSet # Added Union
 from datetime import datetime, timedelta, date 
-from sqlalchemy import select, and_, func, extract, or_ 
-from sqlalchemy.orm import Session 
+import base64
+import bisect
+import json
+import os
+from sqlalchemy import select, insert, update, and_, func, extract, or_, Date 
+from sqlalchemy.dialects.mysql import insert as insert_mysql
+from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased 
+from sqlalchemy.engine import Row
 
 from .models import (
   get_session, Usuario, Empresa, Grupo, Evento, UF,
   TipoAusencia, Turno, FeriadoNacional, FeriadoEstadual,
-  TipoUsuario, StatusEvento, FlagGestor
+  TipoUsuario, StatusEvento, FlagGestor, LancamentoFerias, VersaoEscopo
 )
+from .cache import (
+  identidades_cache, invalidar_usuario, invalidar_usuarios,
+  lancamentos_ferias_cache, referencias_cache
+)
+from .hierarquia import indice_hierarquia
+from .feriados import calendario_feriados
+from .dias_uteis import contar_dias_uteis, contar_dias_uteis_lote
+from .referencias import cache_referencias
+from .disponibilidade import mascara_periodo
+from .senhas import gerar_hashes_senhas, pool_senhas
+from ..validation.input_validator import validar_usuario_input
+
+# Grava Evento.dias_uteis (dias úteis pela UF do evento) junto de total_dias
+STORE_BUSINESS_DAYS = os.getenv('STORE_BUSINESS_DAYS', 'false').lower() == 'true'
 
 # Constants for vacation logic
 VACATION_TYPE_DESCRIPTION = "Férias"
 MAX_VACATION_DAYS_ALLOWANCE = 30
 MIN_EMPLOYMENT_DURATION_DAYS = 365
 
+# Limite de parâmetros por cláusula IN (SQLite antigo aceita no máximo 999)
+IN_CLAUSE_BATCH_SIZE = 900
+
+# Linhas buscadas por vez nas exportações em streaming (cursor no servidor)
+STREAM_BATCH_SIZE = 1000
+
+# Duração máxima de um evento, em dias. Permite limitar por baixo as buscas por
+# sobreposição (data_inicio >= inicio - duração máxima), de modo que o índice
+# percorra só a faixa da janela e não todo o histórico anterior a ela.
+MAX_DURACAO_EVENTO = int(os.getenv('MAX_EVENT_DAYS', '366'))
+
+# Alcance usado nessas buscas: ajustar_alcance_eventos o amplia se o banco já
+# tiver eventos mais longos que o limite (gravados antes dele)
+_alcance_eventos = MAX_DURACAO_EVENTO
+
+
+# ==================== PAGINAÇÃO (KEYSET) ====================
+
+# Chaves de ordenação (sort key, PK) das listagens paginadas
+ORDEM_EVENTOS = (Evento.data_inicio, Evento.id)
+ORDEM_USUARIOS = (Usuario.nome, Usuario.cpf)
+ORDEM_GRUPOS = (Grupo.nome, Grupo.id)
+
+def codificar_cursor(valores: tuple) -> str:
+  """Codifica a chave do último item da página em um cursor opaco."""
+  valores = [v.isoformat() if isinstance(v, date) else v for v in valores]
+  return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip("=")
+
+def decodificar_cursor(cursor: str, ordem: tuple) -> list:
+  """Decodifica um cursor gerado por codificar_cursor para a ordenação informada."""
+  try:
+      valores = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+      if not isinstance(valores, list) or len(valores) != len(ordem):
+          raise ValueError
+      return [
+          date.fromisoformat(v) if isinstance(coluna.type, Date) else v
+          for coluna, v in zip(ordem, valores)
+      ]
+  except (ValueError, TypeError):
+      raise ValueError("Cursor inválido")
+
+def _paginar(query, ordem: tuple, limit: Optional[int] = None, cursor: Optional[str] = None):
+  """
+  Ordena pela chave (sort key, PK) e continua a partir do cursor com um predicado
+  de keyset, sem OFFSET. Busca limit + 1 linhas para saber se há próxima página.
+  """
+  query = query.order_by(*ordem)
+  if cursor:
+      valores = decodificar_cursor(cursor, ordem)
+      query = query.where(or_(*[
+          and_(*[ordem[j] == valores[j] for j in range(i)], ordem[i] > valores[i])
+          for i in range(len(ordem))
+      ]))
+  if limit:
+      query = query.limit(limit + 1)
+  return query
+
+def separar_pagina(itens: list, limit: Optional[int], chave: Callable[[Any], tuple]) -> Tuple[list, Optional[str]]:
+  """Corta o item excedente buscado por _paginar e devolve (itens, próximo cursor)."""
+  if not limit or len(itens) <= limit:
+      return itens, None
+  itens = itens[:limit]
+  return itens, codificar_cursor(chave(itens[-1]))
+
+# ==================== VERSÕES POR ESCOPO (ETAG) ====================
+
+# Escopos: "eventos_grupo"/"eventos_empresa"/"eventos_usuario" mudam com
+# escritas de eventos; "cadastro_empresa" com usuários, grupos e a própria
+# empresa; "cadastro_usuario" com o próprio usuário; "global" com recálculos em
+# massa. Os escopos de uma escrita são lidos na transação dela, e não do índice
+# da hierarquia, que pode estar defasado em relação a outros workers.
+ESCOPO_GLOBAL = ("global", 0)
+
+def _escopos_eventos_usuario(session: Session, *cpfs_usuarios: int) -> List[Tuple[str, int]]:
+  """Escopos de eventos dos usuários (o próprio, o grupo e a empresa de cada um)"""
+  escopos = []
+  for cpf, grupo_id, cnpj_empresa in session.execute(
+      select(Usuario.cpf, Usuario.grupo_id, Grupo.cnpj_empresa)
+      .outerjoin(Grupo, Usuario.grupo_id == Grupo.id)
+      .where(Usuario.cpf.in_(set(cpfs_usuarios)))
+  ).tuples():
+      escopos += [("eventos_usuario", cpf), ("eventos_grupo", grupo_id), ("eventos_empresa", cnpj_empresa)]
+  return escopos
+
+def _empresas_dos_grupos(session: Session, *grupos_ids: Optional[int]) -> Dict[int, int]:
+  """CNPJ da empresa de cada grupo, lido na transação da escrita"""
+  ids = {grupo_id for grupo_id in grupos_ids if grupo_id}
+  if not ids:
+      return {}
+  return dict(session.execute(select(Grupo.id, Grupo.cnpj_empresa).where(Grupo.id.in_(ids))).tuples().all())
+
+def _incrementar_versoes(session: Session, escopos) -> None:
+  """
+  Incrementa os contadores dos escopos na transação da escrita, criando os que
+  ainda não existem em um único upsert por escopo: duas primeiras escritas
+  concorrentes no mesmo escopo não disputam o INSERT. Os escopos seguem uma
+  ordem fixa para que transações concorrentes travem as linhas na mesma
+  sequência. Não faz commit.
+  """
+  dialeto = session.get_bind().dialect.name
+  for escopo, chave in sorted({(escopo, chave) for escopo, chave in escopos if chave is not None}):
+      if dialeto == "mysql":
+          session.execute(
+              insert_mysql(VersaoEscopo).values(escopo=escopo, chave=chave, versao=1)
+              .on_duplicate_key_update(versao=VersaoEscopo.versao + 1)
+          )
+      elif dialeto == "sqlite":
+          session.execute(
+              insert_sqlite(VersaoEscopo).values(escopo=escopo, chave=chave, versao=1)
+              .on_conflict_do_update(index_elements=[VersaoEscopo.escopo, VersaoEscopo.chave],
+                                     set_={"versao": VersaoEscopo.versao + 1})
+          )
+      else:
+          resultado = session.execute(
+              update(VersaoEscopo)
+              .where(and_(VersaoEscopo.escopo == escopo, VersaoEscopo.chave == chave))
+              .values(versao=VersaoEscopo.versao + 1)
+              .execution_options(synchronize_session=False)
+          )
+          if not resultado.rowcount:
+              session.add(VersaoEscopo(escopo=escopo, chave=chave, versao=1))
+
+def escopos_listagem(grupo_id: Optional[int] = None, cnpj_empresa: Optional[int] = None,
+                     cpf_usuario: Optional[int] = None, eventos: bool = True) -> List[Tuple[str, int]]:
+  """
+  Escopos dos quais depende uma listagem de eventos (ou só de cadastro, com
+  eventos=False): a do grupo, a da empresa ou a de um usuário. A de um usuário
+  depende dos escopos do próprio usuário, e não do grupo, para continuar
+  correta se ele for transferido (ou não tiver grupo); a empresa dele é lida
+  do banco.
+  """
+  if cpf_usuario and not grupo_id and not cnpj_empresa:
+      with get_session() as session:
+          cnpj_empresa = session.execute(
+              select(Grupo.cnpj_empresa).join(Usuario, Usuario.grupo_id == Grupo.id)
+              .where(Usuario.cpf == cpf_usuario)
+          ).scalar_one_or_none()
+      escopos = [ESCOPO_GLOBAL, ("cadastro_empresa", cnpj_empresa), ("cadastro_usuario", cpf_usuario)]
+      if eventos:
+          escopos.append(("eventos_usuario", cpf_usuario))
+      return escopos
+  if cnpj_empresa is None and grupo_id:
+      cnpj_empresa = indice_hierarquia.empresa_do_grupo(grupo_id)
+  escopos = [ESCOPO_GLOBAL, ("cadastro_empresa", cnpj_empresa)]
+  if eventos:
+      escopos.append(("eventos_grupo", grupo_id) if grupo_id else ("eventos_empresa", cnpj_empresa))
+  return escopos
+
+def versoes_escopos(escopos: List[Tuple[str, Any]]) -> Tuple[int, ...]:
+  """Versão atual de cada escopo, na ordem recebida (0 se nunca alterado), em uma consulta."""
+  condicoes = [and_(VersaoEscopo.escopo == escopo, VersaoEscopo.chave == chave)
+               for escopo, chave in escopos if chave is not None]
+  versoes = {}
+  if condicoes:
+      with get_session() as session:
+          versoes = {
+              (escopo, chave): versao for escopo, chave, versao in session.execute(
+                  select(VersaoEscopo.escopo, VersaoEscopo.chave, VersaoEscopo.versao).where(or_(*condicoes))
+              ).tuples()
+          }
+  return tuple(versoes.get((escopo, chave), 0) for escopo, chave in escopos)
 
 # ==================== DATE UTILITIES (NEW) ====================
 
@@ -23,6 +206,10 @@ def is_weekend(date_obj: date) -> bool:
 
 def get_holidays_for_uf(session: Session, target_date: date, uf_code: str) -> List[Union[FeriadoNacional, FeriadoEstadual]]:
   """Gets national and specific state holidays for a given date and UF."""
+  # The in-memory calendar answers the common case (no holiday) without touching the DB
+  if not calendario_feriados.is_holiday(target_date, uf_code):
+      return []
+  
   national_holidays = session.execute(
       select(FeriadoNacional).where(FeriadoNacional.data_feriado == target_date)
   ).scalars().all()
@@ -40,45 +227,199 @@ def get_holidays_for_uf(session: Session, target_date: date, uf_code: str) -> Li
   return list(national_holidays) + list(state_holidays)
 
 def is_public_holiday(session: Session, date_obj: date, uf_code: str) -> bool:
-  """Checks if a date is a public holiday for a given UF."""
-  if not uf_code: # Cannot check state holidays without UF
-      # Check only national holidays if UF is not provided
-      national_holidays = session.execute(
-          select(FeriadoNacional).where(FeriadoNacional.data_feriado == date_obj)
-      ).scalars().all()
-      return bool(national_holidays)
-  return bool(get_holidays_for_uf(session, date_obj, uf_code))
+  """
+  Checks if a date is a public holiday for a given UF (national holidays only if UF is not provided).
+  Answered from the per-(year, UF) holiday calendar; `session` is kept for compatibility.
+  """
+  return calendario_feriados.is_holiday(date_obj, uf_code)
+
+def get_holidays_in_range(inicio: date, fim: date, uf_code: Optional[str] = None) -> List[date]:
+  """Lists the holiday dates between inicio and fim (inclusive) for a given UF."""
+  return calendario_feriados.feriados_no_intervalo(inicio, fim, uf_code)
 
 def get_approved_vacation_days_last_12_months(session: Session, cpf_usuario: int, reference_date: date) -> int:
   """
   Calculates the total number of approved vacation days taken by a user
   in the 12 months leading up to the reference_date.
   Vacations are identified by VACATION_TYPE_DESCRIPTION.
+  Answered from the vacation ledger (see lancamento_ferias) instead of a SUM over eventos.
   """
-  # CRITICAL FIX: Case-insensitive and space-trimmed comparison for vacation type in DB query
-  vacation_tipo_ausencia = session.execute(
-      select(TipoAusencia).where(func.lower(func.trim(TipoAusencia.descricao_ausencia)) == VACATION_TYPE_DESCRIPTION.strip().lower())
-  ).scalar_one_or_none()
-
-  # CRITICAL FIX: Prevent crash if "Férias" type is not found in the database.
-  if not vacation_tipo_ausencia:
-      return 0 
-
-  twelve_months_ago = reference_date - timedelta(days=365) 
-
-  approved_vacations = session.execute(
-      select(func.sum(Evento.total_dias)).where(
-          and_(
-              Evento.cpf_usuario == cpf_usuario,
-              Evento.id_tipo_ausencia == vacation_tipo_ausencia.id_tipo_ausencia,
-              Evento.status == StatusEvento.APROVADO.value,
-              Evento.data_inicio >= twelve_months_ago, # Vacations starting within the 12-month window
-              Evento.data_inicio < reference_date # Vacations starting before the reference date (e.g., today)
-          )
+  return dias_ferias_usados(cpf_usuario, reference_date, session)
+
+# ==================== FÉRIAS (RAZÃO) ====================
+
+def _ids_tipo_ferias(session: Session) -> FrozenSet[int]:
+  """
+  Ids dos TipoAusencia de férias, resolvidos uma vez e guardados em referencias_cache.
+  Pode haver mais de um tipo com a mesma descrição; todos contam como férias.
+  """
+  ids_tipo = referencias_cache.get("ids_tipo_ferias")
+  if ids_tipo is None:
+      # CRITICAL FIX: Case-insensitive and space-trimmed comparison for vacation type in DB query
+      ids_tipo = frozenset(session.execute(
+          select(TipoAusencia.id_tipo_ausencia).where(
+              func.lower(func.trim(TipoAusencia.descricao_ausencia)) == VACATION_TYPE_DESCRIPTION.strip().lower())
+      ).scalars())
+      if ids_tipo:
+          referencias_cache.set("ids_tipo_ferias", ids_tipo)
+  return ids_tipo
+
+def _sincronizar_lancamento_ferias(session: Session, evento: Evento) -> None:
+  """
+  Mantém o lançamento de férias do evento coerente com seu estado atual, na mesma
+  transação da alteração: existe apenas para férias aprovadas. Não faz commit.
+  """
+  aprovado_ferias = (evento.status == StatusEvento.APROVADO.value and
+                     evento.id_tipo_ausencia in _ids_tipo_ferias(session))
+  lancamento = evento.lancamento_ferias
+  if not aprovado_ferias:
+      if lancamento is not None:
+          evento.lancamento_ferias = None
+      return
+  if lancamento is None:
+      evento.lancamento_ferias = LancamentoFerias(
+          cpf_usuario=evento.cpf_usuario, data_inicio=evento.data_inicio, dias=evento.total_dias
+      )
+  else:
+      lancamento.cpf_usuario = evento.cpf_usuario
+      lancamento.data_inicio = evento.data_inicio
+      lancamento.dias = evento.total_dias
+
+def _carregar_lancamentos_ferias(session: Session, cpfs: set) -> Dict[int, tuple]:
+  """Carrega (datas ordinais, somas acumuladas) dos usuários ausentes do cache."""
+  carregados: Dict[int, tuple] = {}
+  faltantes = []
+  for cpf in cpfs:
+      lancamentos = lancamentos_ferias_cache.get(cpf)
+      if lancamentos is None:
+          faltantes.append(cpf)
+      else:
+          carregados[cpf] = lancamentos
+  
+  por_cpf: Dict[int, list] = {cpf: [] for cpf in faltantes}
+  for i in range(0, len(faltantes), IN_CLAUSE_BATCH_SIZE):
+      for cpf, data_inicio, dias in session.execute(
+          select(LancamentoFerias.cpf_usuario, LancamentoFerias.data_inicio, LancamentoFerias.dias)
+          .where(LancamentoFerias.cpf_usuario.in_(faltantes[i:i + IN_CLAUSE_BATCH_SIZE]))
+          .order_by(LancamentoFerias.cpf_usuario, LancamentoFerias.data_inicio)
+      ).tuples():
+          por_cpf[cpf].append((data_inicio.toordinal(), dias))
+  
+  for cpf, linhas in por_cpf.items():
+      acumulado = [0]
+      for _, dias in linhas:
+          acumulado.append(acumulado[-1] + dias)
+      lancamentos = (tuple(ordinal for ordinal, _ in linhas), tuple(acumulado))
+      lancamentos_ferias_cache.set(cpf, lancamentos)
+      carregados[cpf] = lancamentos
+  return carregados
+
+def _dias_na_janela(lancamentos: tuple, reference_date: date) -> int:
+  # Mesma janela do cálculo original: inícios em [reference_date - 365 dias, reference_date)
+  ordinais, acumulado = lancamentos
+  fim = reference_date.toordinal()
+  inicio = bisect.bisect_left(ordinais, fim - 365)
+  return acumulado[bisect.bisect_left(ordinais, fim)] - acumulado[inicio]
+
+def dias_ferias_usados(cpf_usuario: int, reference_date: Optional[date] = None,
+                       session: Optional[Session] = None) -> int:
+  """Dias de férias aprovadas iniciadas nos 12 meses anteriores a reference_date (padrão: hoje)."""
+  return saldos_ferias([cpf_usuario], reference_date, session)[cpf_usuario]["dias_usados"]
+
+def saldos_ferias(cpfs: List[int], reference_date: Optional[date] = None,
+                  session: Optional[Session] = None) -> Dict[int, Dict[str, int]]:
+  """
+  Dias usados nos últimos 12 meses e saldo frente a MAX_VACATION_DAYS_ALLOWANCE
+  de cada CPF. Usuários já em cache não custam consultas; os demais são
+  carregados juntos, em uma consulta por bloco de IN_CLAUSE_BATCH_SIZE.
+  """
+  reference_date = reference_date or date.today()
+  cpfs = set(cpfs)
+  if session is None:
+      with get_session() as nova_sessao:
+          lancamentos = _carregar_lancamentos_ferias(nova_sessao, cpfs)
+  else:
+      lancamentos = _carregar_lancamentos_ferias(session, cpfs)
+  
+  saldos = {}
+  for cpf in cpfs:
+      usados = _dias_na_janela(lancamentos[cpf], reference_date)
+      saldos[cpf] = {
+          "dias_usados": usados,
+          "dias_restantes": max(MAX_VACATION_DAYS_ALLOWANCE - usados, 0),
+          "limite": MAX_VACATION_DAYS_ALLOWANCE
+      }
+  return saldos
+
+def iterar_relatorio_ferias(cnpj_empresa: Optional[int] = None, grupo_id: Optional[int] = None,
+                            reference_date: Optional[date] = None, ativos_apenas: bool = True,
+                            lote: int = STREAM_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+  """
+  Elegibilidade (MIN_EMPLOYMENT_DURATION_DAYS de casa) e saldo de férias de todos
+  os usuários de uma empresa ou grupo, em ordem de (nome, cpf). Uma única consulta
+  agrega a razão de férias da janela de 12 meses com GROUP BY sobre Usuario e é
+  lida em lotes de um cursor no servidor.
+  """
+  reference_date = reference_date or date.today()
+  janela = and_(
+      LancamentoFerias.cpf_usuario == Usuario.cpf,
+      LancamentoFerias.data_inicio >= reference_date - timedelta(days=365),
+      LancamentoFerias.data_inicio < reference_date
+  )
+  query = (
+      select(
+          Usuario.cpf, Usuario.nome, Usuario.grupo_id, Usuario.inicio_na_empresa,
+          func.coalesce(func.sum(LancamentoFerias.dias), 0)
       )
-  ).scalar_one_or_none()
+      .outerjoin(LancamentoFerias, janela)
+      .group_by(Usuario.cpf, Usuario.nome, Usuario.grupo_id, Usuario.inicio_na_empresa)
+      .order_by(*ORDEM_USUARIOS)
+  )
+  conditions = []
+  if cnpj_empresa:
+      query = query.join(Grupo, Usuario.grupo_id == Grupo.id)
+      conditions.append(Grupo.cnpj_empresa == cnpj_empresa)
+  if grupo_id:
+      conditions.append(Usuario.grupo_id == grupo_id)
+  if ativos_apenas:
+      conditions.append(Usuario.ativo)
+  if conditions:
+      query = query.where(and_(*conditions))
+  
+  admissao_limite = reference_date - timedelta(days=MIN_EMPLOYMENT_DURATION_DAYS)
+  with get_session() as session:
+      for cpf, nome, grupo_id_usuario, inicio_na_empresa, usados in session.execute(
+              query.execution_options(yield_per=lote)).tuples():
+          elegivel = inicio_na_empresa is not None and inicio_na_empresa <= admissao_limite
+          yield {
+              "cpf": cpf, "nome": nome, "grupo_id": grupo_id_usuario,
+              "inicio_na_empresa": inicio_na_empresa.isoformat() if inicio_na_empresa else None,
+              "elegivel": elegivel,
+              "dias_usados": usados,
+              "dias_restantes": max(MAX_VACATION_DAYS_ALLOWANCE - usados, 0),
+              "limite": MAX_VACATION_DAYS_ALLOWANCE
+          }
 
-  return approved_vacations or 0
+def reconstruir_lancamentos_ferias() -> int:
+  """
+  Recria a razão de férias a partir dos eventos (ex.: banco anterior à tabela ou
+  eventos gravados fora do crud). Retorna a quantidade de lançamentos.
+  """
+  with get_session() as session:
+      ids_tipo = _ids_tipo_ferias(session)
+      session.execute(LancamentoFerias.__table__.delete())
+      total = 0
+      if ids_tipo:
+          origem = select(Evento.id, Evento.cpf_usuario, Evento.data_inicio, Evento.total_dias).where(
+              and_(Evento.id_tipo_ausencia.in_(ids_tipo), Evento.status == StatusEvento.APROVADO.value)
+          )
+          total = session.execute(
+              LancamentoFerias.__table__.insert().from_select(
+                  ["evento_id", "cpf_usuario", "data_inicio", "dias"], origem)
+          ).rowcount
+      session.commit()
+  lancamentos_ferias_cache.clear()
+  return total
 
 # ==================== UF ====================
 
@@ -88,15 +429,14 @@ def criar_uf(cod_uf: int, uf: str) -> UF:
       session.add(estado)
       session.commit()
       session.refresh(estado)
+      cache_referencias.invalidar("ufs")
       return estado
 
 def listar_ufs() -> List[UF]:
-  with get_session() as session:
-      return list(session.execute(select(UF)).scalars().all())
+  return cache_referencias.itens("ufs")
 
 def obter_uf(uf: str) -> Optional[UF]:
-  with get_session() as session:
-      return session.get(UF, uf)
+  return cache_referencias.obter("ufs", uf)
 
 # ==================== EMPRESAS ====================
 
@@ -136,6 +476,7 @@ def atualizar_empresa(cnpj: int, **kwargs) -> bool:
           return False
       for key, value in kwargs.items():
           setattr(empresa, key, value)
+      _incrementar_versoes(session, [("cadastro_empresa", cnpj)])
       session.commit()
       return True
 
@@ -145,6 +486,7 @@ def deletar_empresa(cnpj: int) -> bool:
       if not empresa:
           return False
       empresa.ativa = False
+      _incrementar_versoes(session, [("cadastro_empresa", cnpj)])
       session.commit()
       return True
 
@@ -162,17 +504,22 @@ def criar_grupo(nome: str, cnpj_empresa: int, telefone: str,
           **kwargs
       )
       session.add(grupo)
+      _incrementar_versoes(session, [("cadastro_empresa", cnpj_empresa)])
       session.commit()
       session.refresh(grupo)
+      indice_hierarquia.registrar_grupo(grupo)
       return grupo
 
-def listar_grupos(cnpj_empresa: Optional[int] = None, ativos_apenas: bool = True) -> List[Grupo]:
+def listar_grupos(cnpj_empresa: Optional[int] = None, ativos_apenas: bool = True,
+                limit: Optional[int] = None, cursor: Optional[str] = None) -> List[Grupo]:
   with get_session() as session:
       query = select(Grupo)
       if cnpj_empresa:
           query = query.where(Grupo.cnpj_empresa == cnpj_empresa)
       if ativos_apenas:
           query = query.where(Grupo.ativo)
+      if limit or cursor:
+          query = _paginar(query, ORDEM_GRUPOS, limit, cursor)
       return list(session.execute(query).scalars().all())
 
 def obter_grupo(grupo_id: int) -> Optional[Grupo]:
@@ -184,9 +531,19 @@ def atualizar_grupo(grupo_id: int, **kwargs) -> bool:
       grupo = session.get(Grupo, grupo_id)
       if not grupo:
           return False
+      cnpj_anterior = grupo.cnpj_empresa
       for key, value in kwargs.items():
           setattr(grupo, key, value)
+      escopos = [("cadastro_empresa", cnpj_anterior), ("cadastro_empresa", grupo.cnpj_empresa)]
+      if cnpj_anterior != grupo.cnpj_empresa:
+          # Os eventos do grupo passam a pertencer a outra empresa
+          escopos += [("eventos_empresa", cnpj_anterior), ("eventos_empresa", grupo.cnpj_empresa)]
+      _incrementar_versoes(session, escopos)
       session.commit()
+      indice_hierarquia.registrar_grupo(grupo)
+      if "cnpj_empresa" in kwargs:
+          # A identidade guarda a empresa do grupo; como é raro, descarta tudo
+          invalidar_usuarios()
       return True
 
 def deletar_grupo(grupo_id: int) -> bool:
@@ -195,6 +552,7 @@ def deletar_grupo(grupo_id: int) -> bool:
       if not grupo:
           return False
       grupo.ativo = False
+      _incrementar_versoes(session, [("cadastro_empresa", grupo.cnpj_empresa)])
       session.commit()
       return True
 
@@ -206,15 +564,14 @@ def criar_tipo_ausencia(descricao_ausencia: str, usa_turno: bool = False) -> Tip
       session.add(tipo)
       session.commit()
       session.refresh(tipo)
+      cache_referencias.invalidar("tipos_ausencia")
       return tipo
 
 def listar_tipos_ausencia() -> List[TipoAusencia]:
-  with get_session() as session:
-      return list(session.execute(select(TipoAusencia)).scalars().all())
+  return cache_referencias.itens("tipos_ausencia")
 
 def obter_tipo_ausencia(id_tipo: int) -> Optional[TipoAusencia]:
-  with get_session() as session:
-      return session.get(TipoAusencia, id_tipo)
+  return cache_referencias.obter("tipos_ausencia", id_tipo)
 
 # ==================== TURNOS ====================
 
@@ -224,15 +581,14 @@ def criar_turno(descricao_turno: str) -> Turno:
       session.add(turno)
       session.commit()
       session.refresh(turno)
+      cache_referencias.invalidar("turnos")
       return turno
 
 def listar_turnos() -> List[Turno]:
-  with get_session() as session:
-      return list(session.execute(select(Turno)).scalars().all())
+  return cache_referencias.itens("turnos")
 
 def obter_turno(turno_id: int) -> Optional[Turno]:
-  with get_session() as session:
-      return session.get(Turno, turno_id)
+  return cache_referencias.obter("turnos", turno_id)
 
 # ==================== USUÁRIOS ====================
 
@@ -279,30 +635,178 @@ def criar_usuario(cpf: int, nome: str, email: str, senha: str,
       )
       usuario.set_senha(senha) # Hashes the password
       session.add(usuario)
+      _incrementar_versoes(session, [("cadastro_empresa", _empresas_dos_grupos(session, grupo_id).get(grupo_id)),
+                                     ("cadastro_usuario", cpf)])
       session.commit()
       session.refresh(usuario)
+      invalidar_usuario(cpf)
       return usuario
 
-def autenticar_usuario(email: str, senha: str) -> Optional[Usuario]:
+def _preparar_usuario_importacao(dados: Dict[str, Any]) -> Dict[str, Any]:
+  """Converte uma linha de importação nos valores da tabela usuario (ValueError se inválida)"""
+  if not isinstance(dados, dict):
+      raise ValueError("registro deve ser um objeto")
+  erros = validar_usuario_input(dados)
+  if erros:
+      raise ValueError(erros[0])
+  tipo_usuario = dados.get("tipo_usuario") or TipoUsuario.COMUM.value
+  flag_gestor = dados.get("flag_gestor") or FlagGestor.NAO.value
+  if tipo_usuario not in [e.value for e in TipoUsuario]:
+      raise ValueError(f"tipo_usuario deve ser um de: {[e.value for e in TipoUsuario]}")
+  if flag_gestor not in [e.value for e in FlagGestor]:
+      raise ValueError(f"flag_gestor deve ser um de: {[e.value for e in FlagGestor]}")
+  try:
+      cpf, grupo_id = int(dados["cpf"]), int(dados["grupo_id"])
+  except (TypeError, ValueError):
+      raise ValueError("cpf e grupo_id devem ser numéricos")
+  return {
+      "cpf": cpf,
+      "nome": str(dados["nome"]).strip(),
+      "email": str(dados["email"]).strip().lower(),
+      "senha": str(dados["senha"]),
+      "grupo_id": grupo_id,
+      "inicio_na_empresa": datetime.strptime(dados["inicio_na_empresa"], "%Y-%m-%d").date(),
+      "UF": dados["uf"].upper(),
+      "tipo_usuario": tipo_usuario,
+      "flag_gestor": flag_gestor,
+  }
+
+def importar_usuarios(linhas: Iterable[Dict[str, Any]], grupo_id: Optional[int] = None,
+                      cnpj_empresa: Optional[int] = None, lote: int = STREAM_BATCH_SIZE) -> Dict[str, Any]:
+  """
+  Importa usuários em lote. Valida todas as linhas em uma passada, confere CPFs
+  e emails já cadastrados com consultas por conjunto (IN em blocos), gera os
+  hashes das senhas no pool de processos de senhas.py e insere em lotes de `lote` linhas
+  (executemany), com um commit por lote. `grupo_id`/`cnpj_empresa` limitam os
+  grupos aceitos. Linhas com problema não interrompem a importação: voltam em
+  `erros` com a posição do registro (a partir de 1).
+  """
+  erros: List[Dict[str, Any]] = []
+  validos: List[Tuple[int, Dict[str, Any]]] = []
+  cpfs_vistos, emails_vistos = set(), set()
+
+  def registrar_erro(registro: int, cpf: Any, mensagem: str) -> None:
+      erros.append({"registro": registro, "cpf": cpf, "erro": mensagem})
+
+  total = 0
+  for registro, dados in enumerate(linhas, start=1):
+      total = registro
+      try:
+          usuario = _preparar_usuario_importacao(dados)
+      except (KeyError, ValueError) as e:
+          registrar_erro(registro, dados.get("cpf") if isinstance(dados, dict) else None, str(e))
+          continue
+      cnpj_grupo = indice_hierarquia.empresa_do_grupo(usuario["grupo_id"])
+      if cnpj_grupo is None:
+          registrar_erro(registro, usuario["cpf"], "Grupo não encontrado")
+      elif (grupo_id is not None and usuario["grupo_id"] != grupo_id) or \
+           (cnpj_empresa is not None and cnpj_grupo != cnpj_empresa):
+          registrar_erro(registro, usuario["cpf"], "Sem permissão para criar usuários neste grupo")
+      elif obter_uf(usuario["UF"]) is None:
+          registrar_erro(registro, usuario["cpf"], "UF não cadastrada")
+      elif usuario["cpf"] in cpfs_vistos:
+          registrar_erro(registro, usuario["cpf"], "CPF repetido no arquivo")
+      elif usuario["email"] in emails_vistos:
+          registrar_erro(registro, usuario["cpf"], "Email repetido no arquivo")
+      else:
+          cpfs_vistos.add(usuario["cpf"])
+          emails_vistos.add(usuario["email"])
+          validos.append((registro, usuario))
+
+  with get_session() as session:
+      cpfs_existentes, emails_existentes = set(), set()
+      cpfs, emails = list(cpfs_vistos), list(emails_vistos)
+      for i in range(0, len(cpfs), IN_CLAUSE_BATCH_SIZE):
+          cpfs_existentes.update(session.execute(
+              select(Usuario.cpf).where(Usuario.cpf.in_(cpfs[i:i + IN_CLAUSE_BATCH_SIZE]))).scalars())
+          emails_existentes.update(session.execute(
+              select(Usuario.email).where(Usuario.email.in_(emails[i:i + IN_CLAUSE_BATCH_SIZE]))).scalars())
+
+      novos = []
+      for registro, usuario in validos:
+          if usuario["cpf"] in cpfs_existentes:
+              registrar_erro(registro, usuario["cpf"], "CPF já cadastrado")
+          elif usuario["email"] in emails_existentes:
+              registrar_erro(registro, usuario["cpf"], "Email já cadastrado")
+          else:
+              novos.append((registro, usuario))
+
+      hashes = gerar_hashes_senhas([usuario.pop("senha") for _, usuario in novos])
+      agora = datetime.now()
+      for (_, usuario), senha_hash in zip(novos, hashes):
+          usuario.update(senha_hash=senha_hash, criado_em=agora, ativo=True)
+
+      importados = 0
+      empresas = set()
+      for i in range(0, len(novos), lote):
+          parte = novos[i:i + lote]
+          try:
+              session.execute(insert(Usuario), [usuario for _, usuario in parte])
+              session.commit()
+              inseridos = parte
+          except IntegrityError:
+              # Algum registro entrou em conflito (ex.: cadastro concorrente): insere um a um
+              session.rollback()
+              inseridos = []
+              for registro, usuario in parte:
+                  try:
+                      session.execute(insert(Usuario), [usuario])
+                      session.commit()
+                      inseridos.append((registro, usuario))
+                  except IntegrityError:
+                      session.rollback()
+                      registrar_erro(registro, usuario["cpf"], "Erro de integridade dos dados")
+          importados += len(inseridos)
+          empresas.update(_empresas_dos_grupos(session, *{u["grupo_id"] for _, u in inseridos}).values())
+
+      if importados:
+          _incrementar_versoes(session, [("cadastro_empresa", cnpj) for cnpj in empresas])
+          session.commit()
+
+  erros.sort(key=lambda erro: erro["registro"])
+  return {"total": total, "importados": importados, "erros": erros}
+
+def autenticar_usuario(email: str, senha: str) -> Optional[Row]:
+  """
+  Autentica pelo índice único de email, lendo em uma consulta apenas as colunas
+  usadas no login: as da autenticação e as de usuario_para_dict, com o nome do
+  grupo e o CNPJ da empresa (os tokens e a resposta do login não consultam o
+  banco de novo). Retorna a linha,
+  com os mesmos atributos de Usuario, ou None.
+  """
   with get_session() as session:
       usuario = session.execute(
-          select(Usuario).where(
-              and_(Usuario.email == email.strip().lower(), Usuario.ativo)
-          )
-      ).scalar_one_or_none()
+          select(Usuario.cpf, Usuario.senha_hash, Usuario.ativo, Usuario.tipo_usuario,
+                 Usuario.flag_gestor, Usuario.grupo_id, Usuario.UF,
+                 Usuario.nome, Usuario.email, Usuario.inicio_na_empresa, Usuario.criado_em,
+                 Grupo.nome.label("grupo_nome"), Grupo.cnpj_empresa)
+          .outerjoin(Grupo, Usuario.grupo_id == Grupo.id)
+          .where(and_(Usuario.email == email.strip().lower(), Usuario.ativo))
+      ).one_or_none()
       
-      if usuario and usuario.verificar_senha(senha):
+      if usuario and pool_senhas.verificar(usuario.senha_hash, senha):
+          if pool_senhas.precisa_rehash(usuario.senha_hash):
+              # Hash gerado com método/custo anterior: regrava com a configuração atual
+              session.execute(
+                  update(Usuario).where(Usuario.cpf == usuario.cpf)
+                  .values(senha_hash=pool_senhas.gerar_hash(senha))
+              )
+              session.commit()
           return usuario
       return None
 
 def listar_usuarios(grupo_id: Optional[int] = None, tipo_usuario: Optional[str] = None,
-                 ativos_apenas: bool = True) -> List[Usuario]:
+                 ativos_apenas: bool = True, cnpj_empresa: Optional[int] = None,
+                 limit: Optional[int] = None, cursor: Optional[str] = None) -> List[Usuario]:
   with get_session() as session:
       query = select(Usuario)
       
       conditions = []
       if grupo_id:
           conditions.append(Usuario.grupo_id == grupo_id)
+      if cnpj_empresa:
+          query = query.join(Grupo, Usuario.grupo_id == Grupo.id)
+          conditions.append(Grupo.cnpj_empresa == cnpj_empresa)
       if tipo_usuario:
           if isinstance(tipo_usuario, TipoUsuario):
               tipo_usuario = tipo_usuario.value
@@ -312,18 +816,96 @@ def listar_usuarios(grupo_id: Optional[int] = None, tipo_usuario: Optional[str]
       
       if conditions:
           query = query.where(and_(*conditions))
+      if limit or cursor:
+          query = _paginar(query, ORDEM_USUARIOS, limit, cursor)
       
       return list(session.execute(query).scalars().all())
 
+def iterar_usuarios(grupo_id: Optional[int] = None, tipo_usuario: Optional[str] = None,
+                  ativos_apenas: bool = True, cnpj_empresa: Optional[int] = None,
+                  lote: int = STREAM_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+  """
+  Percorre os usuários já no formato de usuario_para_dict, em ordem de (nome, cpf),
+  buscando `lote` linhas por vez de um cursor no servidor. A sessão fica aberta
+  enquanto o gerador é consumido.
+  """
+  query = (
+      select(
+          Usuario.cpf, Usuario.nome, Usuario.email, Usuario.tipo_usuario,
+          Usuario.grupo_id, Grupo.nome, Usuario.inicio_na_empresa, Usuario.ativo,
+          Usuario.criado_em, Usuario.UF, Usuario.flag_gestor
+      )
+      .outerjoin(Grupo, Usuario.grupo_id == Grupo.id)
+      .order_by(*ORDEM_USUARIOS)
+  )
+  conditions = []
+  if grupo_id:
+      conditions.append(Usuario.grupo_id == grupo_id)
+  if cnpj_empresa:
+      conditions.append(Grupo.cnpj_empresa == cnpj_empresa)
+  if tipo_usuario:
+      if isinstance(tipo_usuario, TipoUsuario):
+          tipo_usuario = tipo_usuario.value
+      conditions.append(Usuario.tipo_usuario == tipo_usuario)
+  if ativos_apenas:
+      conditions.append(Usuario.ativo)
+  if conditions:
+      query = query.where(and_(*conditions))
+  
+  with get_session() as session:
+      for (cpf, nome, email, tipo, grupo_id_usuario, grupo_nome, inicio_na_empresa,
+           ativo, criado_em, uf, flag_gestor) in session.execute(
+               query.execution_options(yield_per=lote)).tuples():
+          yield {
+              "cpf": cpf, "nome": nome, "email": email,
+              "tipo_usuario": tipo, "grupo_id": grupo_id_usuario,
+              "grupo_nome": grupo_nome,
+              "inicio_na_empresa": inicio_na_empresa.isoformat() if inicio_na_empresa else None,
+              "ativo": ativo,
+              "criado_em": criado_em.isoformat() if criado_em else None,
+              "UF": uf, "flag_gestor": flag_gestor
+          }
+
 def obter_usuario(cpf: int) -> Optional[Usuario]:
   with get_session() as session:
       return session.get(Usuario, cpf)
 
+def obter_identidade_usuario(cpf: int):
+  """
+  Retorna apenas os dados usados em autenticação e permissões
+  (cpf, tipo_usuario, flag_gestor, grupo_id, cnpj_empresa, ativo)
+  em uma única consulta, já resolvendo a empresa pelo grupo.
+  O resultado fica em cache (identidades_cache) até expirar ou até o
+  usuário ser alterado por criar/atualizar/deletar_usuario.
+  """
+  identidade = identidades_cache.get(cpf)
+  if identidade is not None:
+      return identidade
+  
+  with get_session() as session:
+      identidade = session.execute(
+          select(
+              Usuario.cpf, Usuario.tipo_usuario, Usuario.flag_gestor,
+              Usuario.grupo_id, Grupo.cnpj_empresa, Usuario.ativo
+          )
+          .outerjoin(Grupo, Usuario.grupo_id == Grupo.id)
+          .where(Usuario.cpf == cpf)
+      ).one_or_none()
+  
+  if identidade is not None:
+      identidades_cache.set(cpf, identidade)
+  return identidade
+
+def estatisticas_cache_identidades() -> Dict[str, Any]:
+  """Retorna os contadores de acerto/falha do cache de identidades."""
+  return identidades_cache.stats()
+
 def atualizar_usuario(cpf: int, **kwargs) -> bool:
   with get_session() as session:
       usuario = session.get(Usuario, cpf)
       if not usuario:
           return False
+      grupo_anterior = usuario.grupo_id
       
       for key, value in kwargs.items():
           if key == "senha":
@@ -341,7 +923,17 @@ def atualizar_usuario(cpf: int, **kwargs) -> bool:
           else:
               setattr(usuario, key, value)
       
+      escopos = [("cadastro_usuario", cpf)]
+      empresas = _empresas_dos_grupos(session, grupo_anterior, usuario.grupo_id)
+      for grupo_id in {grupo_anterior, usuario.grupo_id}:
+          cnpj_empresa = empresas.get(grupo_id)
+          escopos.append(("cadastro_empresa", cnpj_empresa))
+          if grupo_anterior != usuario.grupo_id:
+              # Os eventos do usuário passam a pertencer a outro grupo
+              escopos += [("eventos_grupo", grupo_id), ("eventos_empresa", cnpj_empresa)]
+      _incrementar_versoes(session, escopos)
       session.commit()
+      invalidar_usuario(cpf)
       return True
 
 def deletar_usuario(cpf: int) -> bool:
@@ -350,11 +942,79 @@ def deletar_usuario(cpf: int) -> bool:
       if not usuario:
           return False
       usuario.ativo = False
+      _incrementar_versoes(session, [("cadastro_empresa", _empresas_dos_grupos(session, usuario.grupo_id).get(usuario.grupo_id)),
+                                     ("cadastro_usuario", cpf)])
       session.commit()
+      invalidar_usuario(cpf)
       return True
 
 # ==================== EVENTOS ====================
 
+def inicio_minimo_sobreposicao(inicio: date) -> date:
+  """Menor data_inicio de um evento que ainda pode alcançar `inicio`."""
+  return inicio - timedelta(days=_alcance_eventos - 1)
+
+def _validar_duracao_evento(data_inicio: date, data_fim: date) -> None:
+  """
+  Recusa (400) eventos acima de MAX_DURACAO_EVENTO. É uma regra nova, de
+  propósito: o alcance das buscas é calculado por worker na inicialização, e só
+  com o limite valendo para todas as escritas um evento gravado por outro
+  worker não pode ficar fora do alcance dos demais.
+  """
+  if data_fim < data_inicio:
+      raise ValueError("Data de início não pode ser posterior à data de fim")
+  if (data_fim - data_inicio).days + 1 > MAX_DURACAO_EVENTO:
+      raise ValueError(f"Evento não pode durar mais de {MAX_DURACAO_EVENTO} dias")
+
+def ajustar_alcance_eventos() -> int:
+  """
+  Amplia o alcance das buscas por sobreposição quando o banco tem eventos mais
+  longos que MAX_DURACAO_EVENTO (ex.: gravados antes do limite), para que eles
+  continuem sendo encontrados. Chamado na inicialização. Retorna o alcance em dias.
+  """
+  global _alcance_eventos
+  with get_session() as session:
+      maior = session.execute(select(func.max(Evento.total_dias))).scalar() or 0
+  _alcance_eventos = max(MAX_DURACAO_EVENTO, maior)
+  return _alcance_eventos
+
+class ConflitoEventoError(ValueError):
+  """Evento sobreposto a eventos pendentes ou aprovados do mesmo usuário"""
+
+  def __init__(self, conflitos: List[int]):
+      self.conflitos = conflitos
+      super().__init__(f"Evento sobreposto a outros eventos do usuário: {conflitos}")
+
+def eventos_sobrepostos(session: Session, cpf_usuario: int, inicio: date, fim: date,
+                        ignorar_id: Optional[int] = None) -> List[int]:
+  """
+  IDs dos eventos pendentes ou aprovados do usuário que se sobrepõem ao
+  intervalo fechado [inicio, fim]. Nenhum evento dura mais que o alcance de
+  inicio_minimo_sobreposicao, então basta ler, pelo índice (cpf_usuario,
+  data_inicio), a faixa entre esse mínimo e `fim`. Não depende de os eventos
+  gravados serem disjuntos (dados antigos podem se sobrepor). Uma consulta,
+  sem carregar o histórico.
+  """
+  condicoes = [
+      Evento.cpf_usuario == cpf_usuario,
+      Evento.data_inicio >= inicio_minimo_sobreposicao(inicio),
+      Evento.data_inicio <= fim,
+      Evento.data_fim >= inicio,
+      Evento.status != StatusEvento.REJEITADO.value,
+  ]
+  if ignorar_id is not None:
+      condicoes.append(Evento.id != ignorar_id)
+  return sorted(session.execute(select(Evento.id).where(and_(*condicoes))).scalars())
+
+def _verificar_sobreposicao(session: Session, evento: Evento) -> None:
+  if evento.status == StatusEvento.REJEITADO.value:
+      return
+  with session.no_autoflush:
+      conflitos = eventos_sobrepostos(session, evento.cpf_usuario, evento.data_inicio,
+                                      evento.data_fim, ignorar_id=evento.id)
+  if conflitos:
+      raise ConflitoEventoError(conflitos)
+
 def criar_evento(cpf_usuario: int, data_inicio: str, data_fim: str, 
               id_tipo_ausencia: int, uf: str, aprovado_por: int,
               session: Session 
@@ -363,6 +1023,7 @@ def criar_evento(cpf_usuario: int, data_inicio: str, data_fim: str,
   inicio_date = datetime.strptime(data_inicio, "%Y-%m-%d").date()
   fim_date = datetime.strptime(data_fim, "%Y-%m-%d").date()
   
+  _validar_duracao_evento(inicio_date, fim_date)
   total_dias = (fim_date - inicio_date).days + 1
   
   evento = Evento(
@@ -370,36 +1031,121 @@ def criar_evento(cpf_usuario: int, data_inicio: str, data_fim: str,
       data_inicio=inicio_date,
       data_fim=fim_date,
       total_dias=total_dias,
+      dias_uteis=contar_dias_uteis(inicio_date, fim_date, uf) if STORE_BUSINESS_DAYS else None,
       id_tipo_ausencia=id_tipo_ausencia,
       UF=uf.upper(), # Store UF as uppercase
       aprovado_por=aprovado_por,
       status=StatusEvento.PENDENTE.value,
       criado_em=datetime.now() # Ensure criado_em is set
   )
+  _verificar_sobreposicao(session, evento)
   session.add(evento)
+  _incrementar_versoes(session, _escopos_eventos_usuario(session, cpf_usuario))
   session.commit() # Commit here to ensure event ID is generated if needed by caller
   session.refresh(evento)
   return evento
 
+def _filtrar_eventos(query, cpf_usuario: Optional[int] = None, grupo_id: Optional[int] = None,
+                   status: Optional[str] = None, cnpj_empresa: Optional[int] = None,
+                   inicio: Optional[date] = None, fim: Optional[date] = None,
+                   id_tipo_ausencia: Optional[int] = None):
+  """
+  Aplica os filtros comuns às listagens de eventos (a consulta já deve ter join com Usuario).
+  `inicio`/`fim` selecionam os eventos que se sobrepõem à janela de datas; o
+  limite inferior em data_inicio restringe a faixa lida dos índices por data.
+  """
+  conditions = []
+  if cpf_usuario:
+      conditions.append(Evento.cpf_usuario == cpf_usuario)
+  if inicio:
+      conditions.append(Evento.data_fim >= inicio)
+      conditions.append(Evento.data_inicio >= inicio_minimo_sobreposicao(inicio))
+  if fim:
+      conditions.append(Evento.data_inicio <= fim)
+  if id_tipo_ausencia:
+      conditions.append(Evento.id_tipo_ausencia == id_tipo_ausencia)
+  if grupo_id:
+      conditions.append(Usuario.grupo_id == grupo_id)
+  if cnpj_empresa:
+      query = query.join(Grupo, Usuario.grupo_id == Grupo.id)
+      conditions.append(Grupo.cnpj_empresa == cnpj_empresa)
+  if status:
+      if isinstance(status, StatusEvento): status = status.value
+      conditions.append(Evento.status == status)
+  
+  if conditions:
+      query = query.where(and_(*conditions))
+  return query
+
 def listar_eventos(cpf_usuario: Optional[int] = None, grupo_id: Optional[int] = None,
-                status: Optional[str] = None) -> List[Evento]:
+                status: Optional[str] = None, cnpj_empresa: Optional[int] = None,
+                inicio: Optional[date] = None, fim: Optional[date] = None,
+                id_tipo_ausencia: Optional[int] = None,
+                limit: Optional[int] = None, cursor: Optional[str] = None) -> List[Evento]:
   with get_session() as session:
       query = select(Evento).join(Usuario, Evento.cpf_usuario == Usuario.cpf)
-      
-      conditions = []
-      if cpf_usuario:
-          conditions.append(Evento.cpf_usuario == cpf_usuario)
-      if grupo_id:
-          conditions.append(Usuario.grupo_id == grupo_id)
-      if status:
-          if isinstance(status, StatusEvento): status = status.value
-          conditions.append(Evento.status == status)
-      
-      if conditions:
-          query = query.where(and_(*conditions))
-      
+      query = _filtrar_eventos(query, cpf_usuario, grupo_id, status, cnpj_empresa,
+                               inicio, fim, id_tipo_ausencia)
+      if limit or cursor:
+          query = _paginar(query, ORDEM_EVENTOS, limit, cursor)
       return list(session.execute(query).scalars().all())
 
+def _consulta_eventos_projetados(cpf_usuario: Optional[int] = None, grupo_id: Optional[int] = None,
+                                status: Optional[str] = None, cnpj_empresa: Optional[int] = None,
+                                inicio: Optional[date] = None, fim: Optional[date] = None,
+                                id_tipo_ausencia: Optional[int] = None):
+  """Consulta com as colunas de evento_para_dict (convertidas por _linha_evento_para_dict)."""
+  aprovador = aliased(Usuario, name="aprovador")
+  query = (
+      select(
+          Evento.id, Evento.cpf_usuario, Usuario.nome,
+          Evento.data_inicio, Evento.data_fim, Evento.total_dias, Evento.dias_uteis,
+          Evento.id_tipo_ausencia, TipoAusencia.descricao_ausencia,
+          Evento.status, Evento.aprovado_por, aprovador.nome,
+          Evento.criado_em, Evento.UF
+      )
+      .join(Usuario, Evento.cpf_usuario == Usuario.cpf)
+      .outerjoin(aprovador, Evento.aprovado_por == aprovador.cpf)
+      .outerjoin(TipoAusencia, Evento.id_tipo_ausencia == TipoAusencia.id_tipo_ausencia)
+  )
+  return _filtrar_eventos(query, cpf_usuario, grupo_id, status, cnpj_empresa,
+                          inicio, fim, id_tipo_ausencia)
+
+def listar_eventos_projetados(cpf_usuario: Optional[int] = None, grupo_id: Optional[int] = None,
+                           status: Optional[str] = None, cnpj_empresa: Optional[int] = None,
+                           inicio: Optional[date] = None, fim: Optional[date] = None,
+                           id_tipo_ausencia: Optional[int] = None,
+                           limit: Optional[int] = None, cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+  """
+  Lista eventos já no formato de evento_para_dict, selecionando apenas as
+  colunas necessárias em uma única consulta (sem hidratar objetos ORM).
+  """
+  query = _consulta_eventos_projetados(cpf_usuario, grupo_id, status, cnpj_empresa,
+                                       inicio, fim, id_tipo_ausencia)
+  if limit or cursor:
+      query = _paginar(query, ORDEM_EVENTOS, limit, cursor)
+  
+  with get_session() as session:
+      return [_linha_evento_para_dict(linha) for linha in session.execute(query).tuples()]
+
+def iterar_eventos_projetados(cpf_usuario: Optional[int] = None, grupo_id: Optional[int] = None,
+                           status: Optional[str] = None, cnpj_empresa: Optional[int] = None,
+                           inicio: Optional[date] = None, fim: Optional[date] = None,
+                           id_tipo_ausencia: Optional[int] = None,
+                           lote: int = STREAM_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+  """
+  Versão em gerador de listar_eventos_projetados para exportações: ordena por
+  (data_inicio, id) e busca `lote` linhas por vez de um cursor no servidor, de
+  modo que a memória não cresce com o total de eventos. A sessão fica aberta
+  enquanto o gerador é consumido.
+  """
+  query = _consulta_eventos_projetados(cpf_usuario, grupo_id, status, cnpj_empresa,
+                                       inicio, fim, id_tipo_ausencia).order_by(*ORDEM_EVENTOS)
+  
+  with get_session() as session:
+      for linha in session.execute(query.execution_options(yield_per=lote)).tuples():
+          yield _linha_evento_para_dict(linha)
+
 def obter_evento(evento_id: int) -> Optional[Evento]:
   with get_session() as session:
       return session.get(Evento, evento_id)
@@ -409,6 +1155,7 @@ def atualizar_evento(evento_id: int, **kwargs) -> bool:
       evento = session.get(Evento, evento_id)
       if not evento:
           return False
+      cpf_anterior = evento.cpf_usuario
       
       for key, value in kwargs.items():
           if key in ["data_inicio", "data_fim"] and isinstance(value, str):
@@ -422,18 +1169,53 @@ def atualizar_evento(evento_id: int, **kwargs) -> bool:
               setattr(evento, key, value)
       
       if "data_inicio" in kwargs or "data_fim" in kwargs:
+          _validar_duracao_evento(evento.data_inicio, evento.data_fim)
           evento.total_dias = (evento.data_fim - evento.data_inicio).days + 1
+      if STORE_BUSINESS_DAYS and ("data_inicio" in kwargs or "data_fim" in kwargs or "UF" in kwargs):
+          evento.dias_uteis = contar_dias_uteis(evento.data_inicio, evento.data_fim, evento.UF)
+      if {"data_inicio", "data_fim", "cpf_usuario", "status"} & kwargs.keys():
+          _verificar_sobreposicao(session, evento)
+      _sincronizar_lancamento_ferias(session, evento)
+      _incrementar_versoes(session, _escopos_eventos_usuario(session, cpf_anterior, evento.cpf_usuario))
       
       session.commit()
+      lancamentos_ferias_cache.invalidate(cpf_anterior)
+      lancamentos_ferias_cache.invalidate(evento.cpf_usuario)
       return True
 
+def recalcular_dias_uteis_eventos(lote: int = STREAM_BATCH_SIZE) -> int:
+  """
+  Preenche Evento.dias_uteis de todos os eventos (ex.: ao ativar STORE_BUSINESS_DAYS
+  ou depois de cadastrar feriados), calculando cada lote em uma chamada de
+  contar_dias_uteis_lote. Retorna a quantidade de eventos atualizados.
+  """
+  total = 0
+  with get_session() as session:
+      linhas = session.execute(
+          select(Evento.id, Evento.data_inicio, Evento.data_fim, Evento.UF).order_by(Evento.id)
+      ).tuples().all()
+      for i in range(0, len(linhas), lote):
+          parte = linhas[i:i + lote]
+          dias = contar_dias_uteis_lote((inicio, fim, uf) for _, inicio, fim, uf in parte)
+          session.execute(update(Evento), [
+              {"id": evento_id, "dias_uteis": dias_uteis}
+              for (evento_id, *_), dias_uteis in zip(parte, dias)
+          ])
+          total += len(parte)
+      _incrementar_versoes(session, [ESCOPO_GLOBAL])
+      session.commit()
+  return total
+
 def deletar_evento(evento_id: int) -> bool:
   with get_session() as session:
       evento = session.get(Evento, evento_id)
       if not evento:
           return False
+      # O lançamento de férias do evento é removido em cascata
       session.delete(evento)
+      _incrementar_versoes(session, _escopos_eventos_usuario(session, evento.cpf_usuario))
       session.commit()
+      lancamentos_ferias_cache.invalidate(evento.cpf_usuario)
       return True
 
 def aprovar_evento(evento_id: int, aprovador_cpf: int) -> bool:
@@ -444,8 +1226,11 @@ def aprovar_evento(evento_id: int, aprovador_cpf: int) -> bool:
       
       evento.status = StatusEvento.APROVADO.value
       evento.aprovado_por = aprovador_cpf
+      _sincronizar_lancamento_ferias(session, evento)
+      _incrementar_versoes(session, _escopos_eventos_usuario(session, evento.cpf_usuario))
       
       session.commit()
+      lancamentos_ferias_cache.invalidate(evento.cpf_usuario)
       return True
 
 def rejeitar_evento(evento_id: int, aprovador_cpf: int) -> bool:
@@ -456,10 +1241,107 @@ def rejeitar_evento(evento_id: int, aprovador_cpf: int) -> bool:
       
       evento.status = StatusEvento.REJEITADO.value
       evento.aprovado_por = aprovador_cpf
+      _sincronizar_lancamento_ferias(session, evento)
+      _incrementar_versoes(session, _escopos_eventos_usuario(session, evento.cpf_usuario))
       
       session.commit()
+      lancamentos_ferias_cache.invalidate(evento.cpf_usuario)
       return True
 
+# Resultados por id das decisões em lote
+DECISAO_NAO_ENCONTRADO = "nao_encontrado"
+DECISAO_SEM_PERMISSAO = "sem_permissao"
+DECISAO_NAO_PENDENTE = "nao_pendente"
+# Cabe em um único IN (...), logo em um único UPDATE
+LIMITE_LOTE_DECISAO = IN_CLAUSE_BATCH_SIZE
+
+def decidir_eventos_lote(evento_ids: List[int], aprovador_cpf: int, status_novo: StatusEvento,
+                         grupo_id: Optional[int] = None,
+                         cnpj_empresa: Optional[int] = None) -> Dict[int, str]:
+  """
+  Aprova ou rejeita vários eventos pendentes em uma transação. A permissão já
+  vem resolvida pelo chamador como um escopo (grupo do gestor ou empresa do
+  RH); eventos fora dele ficam como DECISAO_SEM_PERMISSAO. Uma consulta lê os
+  eventos, um único UPDATE ... WHERE id IN (...) AND status = 'pendente' grava a
+  decisão (com RETURNING dos ids alterados; no MySQL, sobre as linhas travadas
+  antes por SELECT ... FOR UPDATE), e razão de férias e versões dos escopos são atualizadas na mesma
+  transação. Retorna o resultado de cada id: o novo status ou o motivo.
+  """
+  if isinstance(status_novo, str): status_novo = StatusEvento(status_novo)
+  ids = list(dict.fromkeys(evento_ids))
+  if len(ids) > LIMITE_LOTE_DECISAO:
+      raise ValueError(f"no máximo {LIMITE_LOTE_DECISAO} eventos por lote")
+  resultados = {evento_id: DECISAO_NAO_ENCONTRADO for evento_id in ids}
+  if not ids:
+      return resultados
+
+  with get_session() as session:
+      linhas = session.execute(
+          select(Evento.id, Evento.cpf_usuario, Evento.status, Evento.id_tipo_ausencia,
+                 Evento.data_inicio, Evento.total_dias, Usuario.grupo_id, Grupo.cnpj_empresa)
+          .join(Usuario, Evento.cpf_usuario == Usuario.cpf)
+          .outerjoin(Grupo, Usuario.grupo_id == Grupo.id)
+          .where(Evento.id.in_(ids))
+      ).tuples().all()
+
+      pendentes = {}
+      for linha in linhas:
+          evento_id, _, status, _, _, _, grupo_evento, cnpj_evento = linha
+          if (grupo_id is not None and grupo_evento != grupo_id) or \
+             (cnpj_empresa is not None and cnpj_evento != cnpj_empresa):
+              resultados[evento_id] = DECISAO_SEM_PERMISSAO
+          elif status != StatusEvento.PENDENTE.value:
+              resultados[evento_id] = DECISAO_NAO_PENDENTE
+          else:
+              pendentes[evento_id] = linha
+      if not pendentes:
+          return resultados
+
+      # Só conta como decidido por este lote o que o próprio UPDATE alterou:
+      # outra requisição pode ter decidido parte dos eventos depois da leitura
+      ainda_pendentes = and_(Evento.id.in_(list(pendentes)), Evento.status == StatusEvento.PENDENTE.value)
+      decisao = {"status": status_novo.value, "aprovado_por": aprovador_cpf}
+      if session.get_bind().dialect.update_returning:
+          decididos = set(session.execute(
+              update(Evento).where(ainda_pendentes).values(**decisao).returning(Evento.id)
+              .execution_options(synchronize_session=False)
+          ).scalars())
+      else:
+          # Sem RETURNING (MySQL): trava as linhas ainda pendentes e grava só elas
+          decididos = set(session.execute(
+              select(Evento.id).where(ainda_pendentes).with_for_update()
+          ).scalars())
+          if decididos:
+              session.execute(
+                  update(Evento).where(Evento.id.in_(decididos)).values(**decisao)
+                  .execution_options(synchronize_session=False)
+              )
+      for evento_id in set(pendentes) - decididos:
+          resultados[evento_id] = DECISAO_NAO_PENDENTE
+          del pendentes[evento_id]
+
+      # Eventos pendentes não têm lançamento; só a aprovação de férias cria um
+      ids_tipo_ferias = _ids_tipo_ferias(session)
+      cpfs_ferias = set()
+      if status_novo == StatusEvento.APROVADO:
+          for evento_id, cpf, _, id_tipo, data_inicio, total_dias, _, _ in pendentes.values():
+              if id_tipo in ids_tipo_ferias:
+                  session.add(LancamentoFerias(evento_id=evento_id, cpf_usuario=cpf,
+                                               data_inicio=data_inicio, dias=total_dias))
+                  cpfs_ferias.add(cpf)
+      _incrementar_versoes(session, [
+          escopo for _, cpf_evento, _, _, _, _, grupo_evento, cnpj_evento in pendentes.values()
+          for escopo in (("eventos_usuario", cpf_evento), ("eventos_grupo", grupo_evento),
+                         ("eventos_empresa", cnpj_evento))
+      ])
+      session.commit()
+
+  for cpf in cpfs_ferias:
+      lancamentos_ferias_cache.invalidate(cpf)
+  for evento_id in pendentes:
+      resultados[evento_id] = status_novo.value
+  return resultados
+
 # ==================== FERIADOS ====================
 
 def criar_feriado_nacional(data_feriado: str, descricao_feriado: str, uf: str = "BR") -> FeriadoNacional: # uf default BR for national
@@ -473,6 +1355,8 @@ def criar_feriado_nacional(data_feriado: str, descricao_feriado: str, uf: str =
       session.add(feriado)
       session.commit()
       session.refresh(feriado)
+      calendario_feriados.invalidar(data.year)
+      cache_referencias.invalidar("feriados_nacionais")
       return feriado
 
 def criar_feriado_estadual(data_feriado: str, uf: str, descricao_feriado: str) -> FeriadoEstadual:
@@ -486,19 +1370,80 @@ def criar_feriado_estadual(data_feriado: str, uf: str, descricao_feriado: str) -
       session.add(feriado)
       session.commit()
       session.refresh(feriado)
+      calendario_feriados.invalidar(data.year)
+      cache_referencias.invalidar("feriados_estaduais")
       return feriado
 
 def listar_feriados_nacionais() -> List[FeriadoNacional]: # Removed uf parameter as national holidays are not UF specific
-  with get_session() as session:
-      query = select(FeriadoNacional)
-      return list(session.execute(query).scalars().all())
+  return cache_referencias.itens("feriados_nacionais")
 
 def listar_feriados_estaduais(uf: Optional[str] = None) -> List[FeriadoEstadual]:
-  with get_session() as session:
-      query = select(FeriadoEstadual)
-      if uf:
-          query = query.where(FeriadoEstadual.uf == uf.upper())
-      return list(session.execute(query).scalars().all())
+  feriados = cache_referencias.itens("feriados_estaduais")
+  if uf:
+      feriados = [f for f in feriados if f.uf == uf.upper()]
+  return feriados
+
+# ==================== REFERÊNCIAS (CACHE) ====================
+
+cache_referencias.registrar(
+  "ufs", lambda session: session.execute(select(UF).order_by(UF.uf)).scalars().all(),
+  chave=lambda uf: uf.uf, para_dict=lambda uf: uf_para_dict(uf)
+)
+cache_referencias.registrar(
+  "tipos_ausencia",
+  lambda session: session.execute(select(TipoAusencia).order_by(TipoAusencia.id_tipo_ausencia)).scalars().all(),
+  chave=lambda tipo: tipo.id_tipo_ausencia, para_dict=lambda tipo: tipo_ausencia_para_dict(tipo)
+)
+cache_referencias.registrar(
+  "turnos", lambda session: session.execute(select(Turno).order_by(Turno.id)).scalars().all(),
+  chave=lambda turno: turno.id, para_dict=lambda turno: turno_para_dict(turno)
+)
+cache_referencias.registrar(
+  "feriados_nacionais",
+  lambda session: session.execute(
+      select(FeriadoNacional).order_by(FeriadoNacional.data_feriado, FeriadoNacional.uf)).scalars().all(),
+  chave=lambda f: (f.data_feriado, f.uf), para_dict=lambda f: feriado_para_dict(f)
+)
+cache_referencias.registrar(
+  "feriados_estaduais",
+  lambda session: session.execute(
+      select(FeriadoEstadual).order_by(FeriadoEstadual.data_feriado, FeriadoEstadual.uf)).scalars().all(),
+  chave=lambda f: (f.data_feriado, f.uf), para_dict=lambda f: feriado_para_dict(f)
+)
+
+def referencia_json(nome: str) -> bytes:
+  """JSON pré-serializado da listagem de uma tabela de referência (ufs, tipos_ausencia, turnos)."""
+  return cache_referencias.json(nome)
+
+def referencia_item_json(nome: str, chave: Any) -> Optional[bytes]:
+  """JSON pré-serializado de um item de uma tabela de referência, ou None se não existir."""
+  return cache_referencias.json_item(nome, chave)
+
+def feriados_json(tipo: Optional[str] = None, uf: Optional[str] = None) -> bytes:
+  """
+  JSON das listagens de feriados: `tipo` "nacional", "estadual" ou None para
+  ambos (com o campo "tipo"). Feriados nacionais valem para todas as UFs, então
+  `uf` filtra apenas os estaduais.
+  """
+  uf = uf.upper() if uf else None
+  if uf and cache_referencias.obter("ufs", uf) is None:
+      uf = "??"  # UF inexistente: nenhum feriado estadual, sem criar uma visão por valor recebido
+  
+  def construir():
+      itens = []
+      if tipo in (None, "nacional"):
+          itens += [dict(d, tipo="nacional") if tipo is None else d
+                    for d in cache_referencias.dicts("feriados_nacionais")]
+      if tipo in (None, "estadual"):
+          itens += [dict(d, tipo="estadual") if tipo is None else d
+                    for d in cache_referencias.dicts("feriados_estaduais") if not uf or d["uf"] == uf]
+      return itens
+  
+  return cache_referencias.visao(("feriados", tipo, uf), construir)
+
+def estatisticas_cache_referencias() -> Dict[str, Any]:
+  """Retorna a versão e os contadores de acerto/falha do cache de referências."""
+  return cache_referencias.stats()
 
 # ==================== CALENDÁRIO ====================
 
@@ -555,8 +1500,58 @@ def eventos_para_calendario(grupo_id: Optional[int] = None, apenas_aprovados: bo
       
       return eventos_calendario
 
+def matriz_disponibilidade(grupo_id: int, inicio: date, fim: date,
+                           status: Optional[str] = None) -> List[Dict[str, Any]]:
+  """
+  Ausências de cada usuário ativo do grupo na janela [inicio, fim], como um
+  vetor de bits por usuário (bit `i` = `inicio + i dias`). Uma consulta (usuários
+  com junção externa aos eventos da janela); cada evento é marcado no vetor com
+  uma única operação de bits. Sem `status`, considera pendentes e aprovados.
+  """
+  dias = fim.toordinal() - inicio.toordinal() + 1
+  condicoes_evento = [Evento.cpf_usuario == Usuario.cpf, Evento.data_fim >= inicio, Evento.data_inicio <= fim,
+                      Evento.data_inicio >= inicio_minimo_sobreposicao(inicio)]
+  if status:
+      if isinstance(status, StatusEvento): status = status.value
+      condicoes_evento.append(Evento.status == status)
+  else:
+      condicoes_evento.append(Evento.status != StatusEvento.REJEITADO.value)
+
+  linhas: Dict[int, Dict[str, Any]] = {}
+  with get_session() as session:
+      resultado = session.execute(
+          select(Usuario.cpf, Usuario.nome, Evento.data_inicio, Evento.data_fim)
+          .select_from(Usuario)
+          .outerjoin(Evento, and_(*condicoes_evento))
+          .where(and_(Usuario.grupo_id == grupo_id, Usuario.ativo))
+          .order_by(Usuario.nome, Usuario.cpf)
+      ).tuples()
+      for cpf, nome, data_inicio, data_fim in resultado:
+          linha = linhas.get(cpf)
+          if linha is None:
+              linha = linhas[cpf] = {"cpf": cpf, "nome": nome, "mascara": 0}
+          if data_inicio is not None:
+              linha["mascara"] |= mascara_periodo(inicio, dias, data_inicio, data_fim)
+  return list(linhas.values())
+
 # ==================== CONVERSORES (para_dict) ====================
 
+def uf_para_dict(uf: UF) -> Dict[str, Any]:
+  return {"uf": uf.uf, "cod_uf": uf.cod_uf}
+
+def tipo_ausencia_para_dict(tipo: TipoAusencia) -> Dict[str, Any]:
+  return {"id": tipo.id_tipo_ausencia, "descricao": tipo.descricao_ausencia, "usa_turno": tipo.usa_turno}
+
+def turno_para_dict(turno: Turno) -> Dict[str, Any]:
+  return {"id": turno.id, "descricao": turno.descricao_ausencia}
+
+def feriado_para_dict(feriado: Union[FeriadoNacional, FeriadoEstadual]) -> Dict[str, Any]:
+  return {
+      "data_feriado": feriado.data_feriado.isoformat(),
+      "uf": feriado.uf,
+      "descricao_feriado": feriado.descricao_feriado
+  }
+
 def empresa_para_dict(empresa: Empresa) -> Dict[str, Any]:
   with get_session() as session:
       total_grupos = session.execute(
@@ -588,10 +1583,13 @@ def grupo_para_dict(grupo: Grupo) -> Dict[str, Any]:
           "total_usuarios": total_usuarios
       }
 
-def usuario_para_dict(usuario: Usuario) -> Dict[str, Any]:
+def usuario_para_dict(usuario: Union[Usuario, Row]) -> Dict[str, Any]:
+  """Aceita também uma linha que já traga `grupo_nome` (ex.: a de autenticar_usuario), sem consultar o grupo"""
   with get_session() as session:
       grupo_nome = None
-      if usuario.grupo_id:
+      if hasattr(usuario, "grupo_nome"):
+          grupo_nome = usuario.grupo_nome
+      elif usuario.grupo_id:
           grupo = session.get(Grupo, usuario.grupo_id)
           grupo_nome = grupo.nome if grupo else None
       
@@ -606,28 +1604,79 @@ def usuario_para_dict(usuario: Usuario) -> Dict[str, Any]:
       }
 
 def evento_para_dict(evento: Evento) -> Dict[str, Any]:
+  return eventos_para_dicts([evento])[0]
+
+def _nomes_usuarios(session: Session, cpfs: set) -> Dict[int, str]:
+  """Resolve os nomes de um conjunto de CPFs em lotes de IN (...)."""
+  nomes: Dict[int, str] = {}
+  cpfs = list(cpfs)
+  for i in range(0, len(cpfs), IN_CLAUSE_BATCH_SIZE):
+      lote = cpfs[i:i + IN_CLAUSE_BATCH_SIZE]
+      nomes.update(session.execute(
+          select(Usuario.cpf, Usuario.nome).where(Usuario.cpf.in_(lote))
+      ).tuples().all())
+  return nomes
+
+def _descricoes_tipos_ausencia(session: Session, ids: set) -> Dict[int, str]:
+  """Resolve as descrições de um conjunto de tipos de ausência."""
+  if not ids:
+      return {}
+  return {
+      id_tipo: descricao.strip()
+      for id_tipo, descricao in session.execute(
+          select(TipoAusencia.id_tipo_ausencia, TipoAusencia.descricao_ausencia)
+          .where(TipoAusencia.id_tipo_ausencia.in_(ids))
+      ).tuples().all()
+  }
+
+def eventos_para_dicts(eventos: List[Evento]) -> List[Dict[str, Any]]:
+  """
+  Converte uma lista de eventos resolvendo nomes de usuários, aprovadores e
+  tipos de ausência com um número constante de consultas por página.
+  """
+  if not eventos:
+      return []
+  
+  cpfs = {e.cpf_usuario for e in eventos}
+  cpfs.update(e.aprovado_por for e in eventos if e.aprovado_por)
+  ids_tipos = {e.id_tipo_ausencia for e in eventos}
+  
   with get_session() as session:
-      usuario = session.get(Usuario, evento.cpf_usuario)
-      usuario_nome = usuario.nome if usuario else "N/A"
-      
-      aprovador_nome = "N/A"
-      if evento.aprovado_por:
-          aprovador = session.get(Usuario, evento.aprovado_por)
-          aprovador_nome = aprovador.nome if aprovador else "N/A"
-      
-      tipo_ausencia_obj = session.get(TipoAusencia, evento.id_tipo_ausencia)
-      tipo_ausencia_desc = tipo_ausencia_obj.descricao_ausencia.strip() if tipo_ausencia_obj else "N/A"
-      
-      return {
+      nomes = _nomes_usuarios(session, cpfs)
+      tipos = _descricoes_tipos_ausencia(session, ids_tipos)
+  
+  return [
+      {
           "id": evento.id, "cpf_usuario": evento.cpf_usuario,
-          "usuario_nome": usuario_nome,
+          "usuario_nome": nomes.get(evento.cpf_usuario, "N/A"),
           "data_inicio": evento.data_inicio.isoformat() if evento.data_inicio else None,
           "data_fim": evento.data_fim.isoformat() if evento.data_fim else None,
-          "total_dias": evento.total_dias,
+          "total_dias": evento.total_dias, "dias_uteis": evento.dias_uteis,
           "id_tipo_ausencia": evento.id_tipo_ausencia,
-          "tipo_ausencia_desc": tipo_ausencia_desc,
+          "tipo_ausencia_desc": tipos.get(evento.id_tipo_ausencia, "N/A"),
           "status": evento.status, "aprovado_por": evento.aprovado_por,
-          "aprovado_por_nome": aprovador_nome,
+          "aprovado_por_nome": nomes.get(evento.aprovado_por, "N/A") if evento.aprovado_por else "N/A",
           "criado_em": evento.criado_em.isoformat() if evento.criado_em else None, 
           "UF": evento.UF
       }
+      for evento in eventos
+  ]
+
+def _linha_evento_para_dict(linha: tuple) -> Dict[str, Any]:
+  """Converte uma linha de listar_eventos_projetados para o formato de evento_para_dict."""
+  (id_evento, cpf_usuario, usuario_nome, data_inicio, data_fim, total_dias, dias_uteis,
+   id_tipo_ausencia, tipo_desc, status, aprovado_por, aprovador_nome,
+   criado_em, uf) = linha
+  return {
+      "id": id_evento, "cpf_usuario": cpf_usuario,
+      "usuario_nome": usuario_nome or "N/A",
+      "data_inicio": data_inicio.isoformat() if data_inicio else None,
+      "data_fim": data_fim.isoformat() if data_fim else None,
+      "total_dias": total_dias, "dias_uteis": dias_uteis,
+      "id_tipo_ausencia": id_tipo_ausencia,
+      "tipo_ausencia_desc": tipo_desc.strip() if tipo_desc else "N/A",
+      "status": status, "aprovado_por": aprovado_por,
+      "aprovado_por_nome": (aprovador_nome or "N/A") if aprovado_por else "N/A",
+      "criado_em": criado_em.isoformat() if criado_em else None,
+      "UF": uf
+  }
@@ -0,0 +1,81 @@
+"""
+Contagem de dias úteis sobre bitsets (no estilo de numpy.busday_count)
+"""
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .feriados import calendario_feriados, CalendarioFeriados
+
+# Segunda a domingo, '1' = dia útil (mesma convenção do weekmask do NumPy)
+SEMANA_UTIL_PADRAO = "1111100"
+
+def _validar_semana(semana_util: str) -> str:
+    if len(semana_util) != 7 or set(semana_util) - {"0", "1"}:
+        raise ValueError("semana_util deve ter 7 dígitos 0/1 (segunda a domingo)")
+    return semana_util
+
+def mascara_semana(inicio: date, dias: int, semana_util: str = SEMANA_UTIL_PADRAO) -> int:
+    """
+    Bitset de `dias` dias a partir de `inicio` em que o bit `i` indica se
+    `inicio + i dias` é dia útil pela semana_util (sem considerar feriados).
+    """
+    if dias <= 0:
+        return 0
+    semana_util = _validar_semana(semana_util)
+    # Semana rotacionada para começar no dia da semana de `inicio`, bit 0 = inicio
+    dia_semana = inicio.weekday()
+    padrao = 0
+    for i in range(7):
+        if semana_util[(dia_semana + i) % 7] == "1":
+            padrao |= 1 << i
+    semanas = dias // 7 + 1
+    repetido = padrao * (((1 << (7 * semanas)) - 1) // 127)
+    return repetido & ((1 << dias) - 1)
+
+def mascara_dias_uteis(inicio: date, fim: date, uf: Optional[str] = None,
+                       semana_util: str = SEMANA_UTIL_PADRAO,
+                       calendario: CalendarioFeriados = calendario_feriados) -> int:
+    """Bitset dos dias úteis no intervalo fechado [inicio, fim] (bit 0 = inicio)"""
+    dias = fim.toordinal() - inicio.toordinal() + 1
+    if dias <= 0:
+        return 0
+    return mascara_semana(inicio, dias, semana_util) & ~calendario.mascara(inicio, fim, uf)
+
+def contar_dias_uteis(inicio: date, fim: date, uf: Optional[str] = None,
+                      semana_util: str = SEMANA_UTIL_PADRAO,
+                      calendario: CalendarioFeriados = calendario_feriados) -> int:
+    """Quantidade de dias úteis no intervalo fechado [inicio, fim] para a UF"""
+    return mascara_dias_uteis(inicio, fim, uf, semana_util, calendario).bit_count()
+
+def contar_dias_uteis_lote(intervalos: Iterable[Tuple[date, date, Optional[str]]],
+                           semana_util: str = SEMANA_UTIL_PADRAO,
+                           calendario: CalendarioFeriados = calendario_feriados) -> List[int]:
+    """
+    Dias úteis de cada (inicio, fim, uf), na ordem recebida. Monta uma única
+    máscara por UF cobrindo todos os intervalos dela e conta cada intervalo
+    recortando essa máscara, em vez de percorrer os dias um a um.
+    """
+    intervalos = list(intervalos)
+    extensoes: Dict[Optional[str], Tuple[date, date]] = {}
+    for inicio, fim, uf in intervalos:
+        if fim < inicio:
+            continue
+        uf = uf.upper() if uf else None
+        atual = extensoes.get(uf)
+        extensoes[uf] = (min(atual[0], inicio), max(atual[1], fim)) if atual else (inicio, fim)
+
+    mascaras = {
+        uf: (base, mascara_dias_uteis(base, ultimo, uf, semana_util, calendario))
+        for uf, (base, ultimo) in extensoes.items()
+    }
+
+    resultado = []
+    for inicio, fim, uf in intervalos:
+        if fim < inicio:
+            resultado.append(0)
+            continue
+        base, mascara = mascaras[uf.upper() if uf else None]
+        dias = fim.toordinal() - inicio.toordinal() + 1
+        recorte = (mascara >> (inicio.toordinal() - base.toordinal())) & ((1 << dias) - 1)
+        resultado.append(recorte.bit_count())
+    return resultado
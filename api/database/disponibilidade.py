@@ -0,0 +1,52 @@
+"""
+Vetores de dias em bits para a matriz de disponibilidade (usuários × dias)
+"""
+import base64
+from datetime import date
+from typing import List
+
+CODIFICACAO_RLE = 'rle'
+CODIFICACAO_BASE64 = 'base64'
+
+def mascara_periodo(base: date, dias: int, inicio: date, fim: date) -> int:
+    """
+    Bits do intervalo fechado [inicio, fim] em um vetor de `dias` dias a partir
+    de `base` (bit `i` = `base + i dias`), recortado à janela. Uma operação sobre
+    inteiro, qualquer que seja a duração do período.
+    """
+    primeiro = max(inicio.toordinal() - base.toordinal(), 0)
+    ultimo = min(fim.toordinal() - base.toordinal(), dias - 1)
+    if ultimo < primeiro:
+        return 0
+    return ((1 << (ultimo - primeiro + 1)) - 1) << primeiro
+
+def codificar_rle(mascara: int, dias: int) -> List[int]:
+    """
+    Comprimentos das sequências alternadas de dias, começando pelos dias livres
+    (bit 0): [3, 2, 5] = 3 dias livres, 2 ausentes e 5 livres. A primeira
+    sequência tem comprimento 0 quando a janela começa com ausência.
+    """
+    sequencias = []
+    posicao = 0
+    ausente = False
+    while posicao < dias:
+        resto = mascara >> posicao
+        if ausente:
+            # Primeiro bit 0 a partir da posição atual
+            proximo = (~resto & (resto + 1)).bit_length() - 1
+        else:
+            proximo = (resto & -resto).bit_length() - 1 if resto else dias - posicao
+        proximo = min(proximo, dias - posicao)
+        sequencias.append(proximo)
+        posicao += proximo
+        ausente = not ausente
+    return sequencias
+
+def codificar_base64(mascara: int, dias: int) -> str:
+    """Bitset em base64, little-endian: bit `i % 8` do byte `i // 8` = dia `i`"""
+    return base64.b64encode(mascara.to_bytes((dias + 7) // 8, 'little')).decode('ascii')
+
+CODIFICADORES = {
+    CODIFICACAO_RLE: codificar_rle,
+    CODIFICACAO_BASE64: codificar_base64,
+}
@@ -0,0 +1,105 @@
+"""
+Calendário de feriados em memória, por (ano, UF)
+"""
+import os
+import time
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select, and_
+
+from .models import get_session, FeriadoNacional, FeriadoEstadual
+
+class CalendarioFeriados:
+    """
+    Guarda os feriados de cada ano como bitsets (bit `i` = `i`-ésimo dia do ano):
+    um para os nacionais e um por UF para os estaduais. Cada ano é carregado com
+    duas consultas no primeiro uso, descartado pelas funções de criação de
+    feriado do crud e recarregado depois de `ttl` segundos para absorver
+    escritas de outros workers.
+    """
+
+    def __init__(self, ttl: float = 3600.0):
+        self.ttl = ttl
+        self._anos: Dict[int, Tuple[float, int, Dict[str, int]]] = {}
+        self._lock = threading.Lock()
+
+    def _ano(self, ano: int) -> Tuple[int, Dict[str, int]]:
+        item = self._anos.get(ano)
+        if item is not None and item[0] > time.monotonic():
+            return item[1], item[2]
+        with self._lock:
+            item = self._anos.get(ano)
+            if item is not None and item[0] > time.monotonic():
+                return item[1], item[2]
+            inicio, fim = date(ano, 1, 1), date(ano, 12, 31)
+            base = inicio.toordinal()
+            nacionais = 0
+            estaduais: Dict[str, int] = {}
+            with get_session() as session:
+                for data_feriado in session.execute(
+                    select(FeriadoNacional.data_feriado).where(
+                        and_(FeriadoNacional.data_feriado >= inicio, FeriadoNacional.data_feriado <= fim))
+                ).scalars():
+                    nacionais |= 1 << (data_feriado.toordinal() - base)
+                for data_feriado, uf in session.execute(
+                    select(FeriadoEstadual.data_feriado, FeriadoEstadual.uf).where(
+                        and_(FeriadoEstadual.data_feriado >= inicio, FeriadoEstadual.data_feriado <= fim))
+                ).tuples():
+                    uf = uf.upper()
+                    estaduais[uf] = estaduais.get(uf, 0) | 1 << (data_feriado.toordinal() - base)
+            self._anos[ano] = (time.monotonic() + self.ttl, nacionais, estaduais)
+            return nacionais, estaduais
+
+    def _bits_ano(self, ano: int, uf: Optional[str]) -> int:
+        nacionais, estaduais = self._ano(ano)
+        return nacionais | estaduais.get(uf.upper(), 0) if uf else nacionais
+
+    def is_holiday(self, data: date, uf: Optional[str] = None) -> bool:
+        """Indica se a data é feriado nacional ou estadual da UF (sem UF, apenas nacional)"""
+        return bool(self._bits_ano(data.year, uf) >> (data.timetuple().tm_yday - 1) & 1)
+
+    def mascara(self, inicio: date, fim: date, uf: Optional[str] = None) -> int:
+        """
+        Bitset dos feriados no intervalo fechado [inicio, fim]: o bit `i` indica
+        se `inicio + i dias` é feriado. Retorna 0 para intervalos vazios.
+        """
+        if fim < inicio:
+            return 0
+        mascara = 0
+        deslocamento = 0
+        for ano in range(inicio.year, fim.year + 1):
+            primeiro = inicio if ano == inicio.year else date(ano, 1, 1)
+            ultimo = fim if ano == fim.year else date(ano, 12, 31)
+            dias = ultimo.toordinal() - primeiro.toordinal() + 1
+            bits = self._bits_ano(ano, uf) >> (primeiro.timetuple().tm_yday - 1)
+            mascara |= (bits & ((1 << dias) - 1)) << deslocamento
+            deslocamento += dias
+        return mascara
+
+    def feriados_no_intervalo(self, inicio: date, fim: date, uf: Optional[str] = None) -> List[date]:
+        """Datas de feriado no intervalo fechado [inicio, fim], em ordem"""
+        return list(_datas_da_mascara(inicio, self.mascara(inicio, fim, uf)))
+
+    def contar_feriados(self, inicio: date, fim: date, uf: Optional[str] = None) -> int:
+        """Quantidade de feriados no intervalo fechado [inicio, fim]"""
+        return self.mascara(inicio, fim, uf).bit_count()
+
+    def invalidar(self, ano: Optional[int] = None) -> None:
+        """Descarta um ano (ou todos), forçando a recarga no próximo uso"""
+        with self._lock:
+            if ano is None:
+                self._anos.clear()
+            else:
+                self._anos.pop(ano, None)
+
+def _datas_da_mascara(inicio: date, mascara: int) -> Iterator[date]:
+    i = 0
+    while mascara:
+        if mascara & 1:
+            yield inicio + timedelta(days=i)
+        mascara >>= 1
+        i += 1
+
+calendario_feriados = CalendarioFeriados(ttl=float(os.getenv('HOLIDAY_CALENDAR_TTL', '3600')))
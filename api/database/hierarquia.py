@@ -0,0 +1,67 @@
+"""
+Índice em memória da hierarquia Empresa (CNPJ) → Grupo
+"""
+import os
+import time
+import threading
+from typing import Dict, Optional
+
+from sqlalchemy import select
+
+from .models import get_session, Grupo
+
+class IndiceHierarquia:
+    """
+    Mapeia grupo_id → cnpj_empresa. É carregado por completo no primeiro uso e
+    mantido pelas funções de criação e atualização de grupo do crud. Como cada
+    processo tem sua própria cópia, o índice é recarregado depois de `ttl`
+    segundos para absorver escritas de outros workers; grupos criados por outro
+    worker nesse intervalo são buscados no banco na primeira consulta.
+
+    Os usuários não ficam aqui: uma cópia de todos eles em cada worker não tem
+    como ser invalidada pelas escritas dos demais. As permissões sobre outros
+    usuários usam o cache de identidades (obter_identidade_usuario), consultado
+    por CPF e com validade curta.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._grupos: Dict[int, int] = {}
+        self._expira_em = 0.0
+        self._lock = threading.Lock()
+
+    def _garantir_carregado(self) -> None:
+        if self._expira_em > time.monotonic():
+            return
+        with self._lock:
+            if self._expira_em > time.monotonic():
+                return
+            with get_session() as session:
+                self._grupos = dict(session.execute(select(Grupo.id, Grupo.cnpj_empresa)).tuples().all())
+            self._expira_em = time.monotonic() + self.ttl
+
+    def empresa_do_grupo(self, grupo_id: int) -> Optional[int]:
+        """Retorna o CNPJ da empresa de um grupo"""
+        self._garantir_carregado()
+        cnpj_empresa = self._grupos.get(grupo_id)
+        if cnpj_empresa is None:
+            with get_session() as session:
+                cnpj_empresa = session.execute(
+                    select(Grupo.cnpj_empresa).where(Grupo.id == grupo_id)
+                ).scalar_one_or_none()
+            if cnpj_empresa is not None:
+                with self._lock:
+                    self._grupos[grupo_id] = cnpj_empresa
+        return cnpj_empresa
+
+    def registrar_grupo(self, grupo: Grupo) -> None:
+        """Atualiza (ou inclui) um grupo já persistido"""
+        with self._lock:
+            if self._expira_em:
+                self._grupos[grupo.id] = grupo.cnpj_empresa
+
+    def invalidar(self) -> None:
+        """Força a recarga completa no próximo uso"""
+        self._expira_em = 0.0
+
+indice_hierarquia = IndiceHierarquia(ttl=float(os.getenv('HIERARCHY_INDEX_TTL', '300')))
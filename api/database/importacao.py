@@ -0,0 +1,37 @@
+"""
+Leitura dos arquivos de importação em lote de usuários (CSV ou NDJSON)
+"""
+import csv
+import json
+from typing import Any, Dict, IO, Iterator
+
+FORMATO_CSV = 'csv'
+FORMATO_NDJSON = 'ndjson'
+
+# Colunas do CSV (cabeçalho obrigatório); as duas últimas são opcionais
+COLUNAS_USUARIO = ("cpf", "nome", "email", "senha", "grupo_id", "inicio_na_empresa", "uf",
+                   "tipo_usuario", "flag_gestor")
+
+def ler_usuarios_csv(arquivo: IO[str]) -> Iterator[Dict[str, Any]]:
+    """Uma linha do CSV por usuário; células vazias são tratadas como ausentes"""
+    for linha in csv.DictReader(arquivo):
+        yield {chave.strip(): valor.strip() for chave, valor in linha.items()
+               if chave and valor is not None and valor.strip()}
+
+def ler_usuarios_ndjson(arquivo: IO[str]) -> Iterator[Dict[str, Any]]:
+    """Um objeto JSON por linha; linhas em branco são ignoradas"""
+    for numero, linha in enumerate(arquivo, start=1):
+        if not linha.strip():
+            continue
+        try:
+            dados = json.loads(linha)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"linha {numero}: JSON inválido ({e.msg})")
+        if not isinstance(dados, dict):
+            raise ValueError(f"linha {numero}: esperado um objeto JSON")
+        yield dados
+
+LEITORES = {
+    FORMATO_CSV: ler_usuarios_csv,
+    FORMATO_NDJSON: ler_usuarios_ndjson,
+}
@@ -2,11 +2,13 @@ from typing import List, Optional
 from datetime import datetime, date
 from enum import Enum as PyEnum
 
-from sqlalchemy import create_engine, String, Boolean, Integer, ForeignKey, DateTime, Text, Date, BigInteger, CHAR, text
+from sqlalchemy import create_engine, String, Boolean, Integer, ForeignKey, DateTime, Text, Date, BigInteger, CHAR, Index, text, inspect, func
 from sqlalchemy.orm import mapped_column, DeclarativeBase, Mapped, Session, relationship
-from werkzeug.security import generate_password_hash, check_password_hash
 import os
 
+from .senhas import pool_senhas
+from .perfil_sqlite import pragmas_configurados, opcoes_engine_sqlite, aplicar_pragmas, pragmas_efetivos
+
 # Variável global para a engine
 engine = None
 
@@ -118,7 +120,7 @@ class Usuario(Base):
     cpf: Mapped[int] = mapped_column(BigInteger, primary_key=True, nullable=False)
     nome: Mapped[str] = mapped_column(String(100), nullable=False)
     email: Mapped[str] = mapped_column(String(100), nullable=False)
-    senha_hash: Mapped[str] = mapped_column(String(515), nullable=False, unique=True)
+    senha_hash: Mapped[str] = mapped_column(String(515), nullable=False)
     # Usando String em vez de Enum para compatibilidade com schema existente
     tipo_usuario: Mapped[str] = mapped_column(String(10), nullable=False, default="comum")
     grupo_id: Mapped[int] = mapped_column(Integer, ForeignKey("grupo.id"), nullable=False)
@@ -144,14 +146,19 @@ class Usuario(Base):
         back_populates="aprovador"
     )
     
+    __table_args__ = (
+        # O crud grava o email já normalizado (strip + lower), então o índice vale para o email normalizado
+        Index("ux_usuario_email", "email", unique=True),
+    )
+    
     def __repr__(self):
         return f"Usuario({self.cpf!r}, {self.email!r}, {self.tipo_usuario!r})"
     
     def set_senha(self, senha: str):
-        self.senha_hash = generate_password_hash(senha)
+        self.senha_hash = pool_senhas.gerar_hash(senha)
     
     def verificar_senha(self, senha: str) -> bool:
-        return check_password_hash(self.senha_hash, senha)
+        return pool_senhas.verificar(self.senha_hash, senha)
     
     def pode_gerenciar_grupo(self, grupo_id: int) -> bool:
         """Verifica se o usuário pode gerenciar um grupo específico"""
@@ -171,12 +178,20 @@ class Usuario(Base):
 
 class Evento(Base):
     __tablename__ = "evento"
+    __table_args__ = (
+        # Calendário e listagens filtram por usuário/status dentro de uma janela de datas
+        Index("ix_evento_cpf_usuario_data_inicio", "cpf_usuario", "data_inicio"),
+        Index("ix_evento_status_data_inicio", "status", "data_inicio"),
+        Index("ix_evento_id_tipo_ausencia", "id_tipo_ausencia"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True, nullable=False)
     cpf_usuario: Mapped[int] = mapped_column(BigInteger, ForeignKey("usuario.cpf"), nullable=False)
     data_inicio: Mapped[date] = mapped_column(Date, nullable=False)
     data_fim: Mapped[date] = mapped_column(Date, nullable=False)
     total_dias: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Preenchido apenas com STORE_BUSINESS_DAYS ativo (ver crud.criar_evento)
+    dias_uteis: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     id_tipo_ausencia: Mapped[int] = mapped_column(Integer, ForeignKey("tipo_ausencia.id_tipo_ausencia"), nullable=False)
     # Usando String em vez de Enum para compatibilidade com schema existente
     status: Mapped[str] = mapped_column(String(15), nullable=False, default="pendente")
@@ -197,10 +212,62 @@ class Evento(Base):
     )
     tipo_ausencia: Mapped["TipoAusencia"] = relationship("TipoAusencia", back_populates="eventos")
     estado: Mapped["UF"] = relationship("UF", back_populates="eventos")
+    lancamento_ferias: Mapped[Optional["LancamentoFerias"]] = relationship(
+        "LancamentoFerias",
+        back_populates="evento",
+        cascade="all, delete-orphan",
+        uselist=False
+    )
     
     def __repr__(self):
         return f"Evento({self.id!r}, {self.status!r})"
 
+class LancamentoFerias(Base):
+    """Razão de férias: uma linha por evento de férias aprovado, mantida pelo crud junto do evento"""
+    __tablename__ = "lancamento_ferias"
+    __table_args__ = (
+        Index("ix_lancamento_ferias_cpf_usuario_data_inicio", "cpf_usuario", "data_inicio"),
+    )
+    
+    evento_id: Mapped[int] = mapped_column(Integer, ForeignKey("evento.id", ondelete="CASCADE"), primary_key=True, nullable=False)
+    cpf_usuario: Mapped[int] = mapped_column(BigInteger, ForeignKey("usuario.cpf"), nullable=False)
+    data_inicio: Mapped[date] = mapped_column(Date, nullable=False)
+    dias: Mapped[int] = mapped_column(Integer, nullable=False)
+    
+    # Relacionamentos
+    evento: Mapped["Evento"] = relationship("Evento", back_populates="lancamento_ferias")
+    
+    def __repr__(self):
+        return f"LancamentoFerias({self.evento_id!r}, {self.cpf_usuario!r}, {self.dias!r})"
+
+class VersaoEscopo(Base):
+    """Contador de alterações por escopo (ex.: eventos de um grupo), usado nos ETags das listagens"""
+    __tablename__ = "versao_escopo"
+    
+    escopo: Mapped[str] = mapped_column(String(20), primary_key=True, nullable=False)
+    chave: Mapped[int] = mapped_column(BigInteger, primary_key=True, nullable=False)
+    versao: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"VersaoEscopo({self.escopo!r}, {self.chave!r}, {self.versao!r})"
+
+class TokenRevogado(Base):
+    """Tokens JWT revogados (logout), por jti, até expirarem"""
+    __tablename__ = "token_revogado"
+    
+    jti: Mapped[str] = mapped_column(String(64), primary_key=True, nullable=False)
+    expira_em: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # Relógio do banco, o mesmo usado pelos workers para sincronizar
+    revogado_em: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=func.current_timestamp())
+    
+    __table_args__ = (
+        Index("ix_token_revogado_expira_em", "expira_em"),
+        Index("ix_token_revogado_revogado_em", "revogado_em"),
+    )
+    
+    def __repr__(self):
+        return f"TokenRevogado({self.jti!r}, {self.expira_em!r})"
+
 class FeriadoNacional(Base):
     __tablename__ = "feriados_nacionais"
     
@@ -258,19 +325,36 @@ def init_db(database_url: Optional[str] = None):
         else:
             # Configurações para SQLite
             os.makedirs("database", exist_ok=True)
+            pragmas = pragmas_configurados()
             engine = create_engine(
                 database_url,
                 echo=False,
-                connect_args={"check_same_thread": False}
+                **opcoes_engine_sqlite(database_url, pragmas)
             )
-            
+            aplicar_pragmas(engine, pragmas)
+
             # Testa a conexão SQLite
             with engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
                 print("✅ Conexão com SQLite estabelecida com sucesso!")
+            if pragmas:
+                efetivos = pragmas_efetivos(engine)
+                print(f"⚙️  SQLite: journal_mode={efetivos['journal_mode']}, synchronous={efetivos['synchronous']}, "
+                      f"mmap_size={efetivos['mmap_size']}, cache_size={efetivos['cache_size']}")
         
         # Cria as tabelas
         Base.metadata.create_all(bind=engine)
+        
+        # create_all não adiciona colunas nem índices novos a tabelas já existentes
+        _adicionar_colunas_opcionais()
+        _migrar_indices_usuario()
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                try:
+                    index.create(bind=engine, checkfirst=True)
+                except Exception as e:
+                    # Ex.: índice único sobre dados ainda duplicados; a API segue sem ele
+                    print(f"⚠️  Índice {index.name} não criado: {e}")
         print("✅ Tabelas criadas/verificadas!")
         
     except Exception as e:
@@ -283,6 +367,32 @@ def init_db(database_url: Optional[str] = None):
         else:
             raise
 
+def _adicionar_colunas_opcionais():
+    """Adiciona às tabelas existentes as colunas anuláveis declaradas depois da criação"""
+    inspetor = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existentes = {coluna["name"] for coluna in inspetor.get_columns(table.name)}
+            for coluna in table.columns:
+                if coluna.name not in existentes and coluna.nullable:
+                    tipo = coluna.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {coluna.name} {tipo}"))
+                    print(f"✅ Coluna {table.name}.{coluna.name} adicionada")
+
+def _migrar_indices_usuario():
+    """
+    Normaliza os emails gravados antes do índice único ux_usuario_email e remove o
+    índice UNIQUE de senha_hash de bancos MySQL criados antes da mudança. No
+    SQLite esse índice é automático e só sai recriando a tabela.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE usuario SET email = LOWER(TRIM(email)) WHERE email <> LOWER(TRIM(email))"))
+        if engine.dialect.name == "mysql":
+            for indice in inspect(conn).get_indexes("usuario"):
+                if indice.get("unique") and indice["column_names"] == ["senha_hash"]:
+                    conn.execute(text(f"ALTER TABLE usuario DROP INDEX `{indice['name']}`"))
+                    print(f"✅ Índice único {indice['name']} de usuario.senha_hash removido")
+
 def get_session() -> Session:
     """Retorna uma nova sessão do banco de dados"""
     return Session(bind=engine)
@@ -0,0 +1,90 @@
+"""
+Perfil de ajuste do SQLite usado quando o MySQL não está disponível
+"""
+import os
+import re
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# Aplicados nesta ordem em cada conexão nova; busy_timeout vem antes de
+# journal_mode porque a troca para WAL precisa de um lock exclusivo
+PRAGMAS_PADRAO: Dict[str, Any] = {
+    "busy_timeout": 5000,           # ms esperando um lock antes de "database is locked"
+    "journal_mode": "WAL",          # leitores não bloqueiam o escritor (e vice-versa)
+    "synchronous": "NORMAL",        # em WAL, seguro contra corrupção; fsync só no checkpoint
+    "mmap_size": 268435456,         # 256 MiB lidos via mmap, sem cópia para o cache de páginas
+    "cache_size": -65536,           # 64 MiB de cache de páginas por conexão (negativo = KiB)
+    "temp_store": "MEMORY",         # tabelas temporárias de ORDER BY/GROUP BY em memória
+    # Desligado, como no padrão do SQLite: feriados nacionais usam uf="BR", que
+    # não existe na tabela uf. SQLITE_FOREIGN_KEYS=ON liga a verificação.
+    "foreign_keys": "OFF",
+}
+
+_VALOR_PRAGMA = re.compile(r"^-?\w+$")
+
+# Os PRAGMAs enumerados são lidos de volta como números
+_NOMES_ENUMERADOS = {
+    "synchronous": {0: "OFF", 1: "NORMAL", 2: "FULL", 3: "EXTRA"},
+    "temp_store": {0: "DEFAULT", 1: "FILE", 2: "MEMORY"},
+}
+
+def sqlite_em_memoria(database_url: str) -> bool:
+    return database_url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in database_url
+
+def pragmas_configurados() -> Dict[str, Any]:
+    """
+    PRAGMAs do perfil, cada um sobrescrito pela variável SQLITE_<NOME>
+    (ex.: SQLITE_MMAP_SIZE=0). SQLITE_TUNING=false desativa o perfil inteiro e
+    mantém os padrões do SQLite.
+    """
+    if os.getenv('SQLITE_TUNING', 'true').lower() == 'false':
+        return {}
+    pragmas = {}
+    for nome, padrao in PRAGMAS_PADRAO.items():
+        valor = os.getenv(f'SQLITE_{nome.upper()}', str(padrao))
+        if not _VALOR_PRAGMA.match(valor):
+            raise ValueError(f"Valor inválido para SQLITE_{nome.upper()}: {valor!r}")
+        pragmas[nome] = valor
+    return pragmas
+
+def opcoes_engine_sqlite(database_url: str, pragmas: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Argumentos de create_engine para o SQLite. Bancos em arquivo usam um
+    QueuePool dimensionado para os threads do servidor: cada thread trabalha em
+    sua própria conexão, e com WAL as leituras seguem em paralelo à escrita.
+    Bancos em memória mantêm o pool padrão, que compartilha a única conexão.
+    """
+    opcoes: Dict[str, Any] = {"connect_args": {"check_same_thread": False}}
+    if pragmas and not sqlite_em_memoria(database_url):
+        opcoes.update(
+            poolclass=QueuePool,
+            pool_size=int(os.getenv('SQLITE_POOL_SIZE', '10')),
+            max_overflow=int(os.getenv('SQLITE_POOL_OVERFLOW', '20')),
+            pool_timeout=float(os.getenv('SQLITE_POOL_TIMEOUT', '30')),
+        )
+    return opcoes
+
+def aplicar_pragmas(engine: Engine, pragmas: Dict[str, Any]) -> None:
+    """Executa os PRAGMAs em cada conexão aberta pela engine"""
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _configurar_conexao(conexao_dbapi, _registro):
+        cursor = conexao_dbapi.cursor()
+        try:
+            for nome, valor in pragmas.items():
+                cursor.execute(f"PRAGMA {nome}={valor}")
+        finally:
+            cursor.close()
+
+def pragmas_efetivos(engine: Engine) -> Dict[str, Any]:
+    """Valores em vigor numa conexão da engine (para conferência e benchmarks)"""
+    with engine.connect() as conn:
+        valores = {nome: conn.exec_driver_sql(f"PRAGMA {nome}").scalar() for nome in PRAGMAS_PADRAO}
+    for nome, nomes in _NOMES_ENUMERADOS.items():
+        valores[nome] = nomes.get(valores[nome], valores[nome])
+    return valores
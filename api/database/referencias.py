@@ -0,0 +1,124 @@
+"""
+Cache em memória das tabelas de referência (tipos de ausência, turnos, UFs, feriados)
+"""
+import json
+import os
+import time
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .models import get_session
+
+def serializar_json(dados: Any) -> bytes:
+    """Mesma saída do jsonify do Flask fora do modo debug (chaves ordenadas, compacto)"""
+    return (json.dumps(dados, ensure_ascii=True, sort_keys=True, separators=(",", ":")) + "\n").encode()
+
+class _Tabela:
+    __slots__ = ("carregar", "chave", "para_dict", "itens", "por_chave", "dicts", "json",
+                 "json_por_chave", "expira_em")
+
+    def __init__(self, carregar, chave, para_dict):
+        self.carregar = carregar
+        self.chave = chave
+        self.para_dict = para_dict
+        self.expira_em = 0.0
+
+class CacheReferencias:
+    """
+    Mantém cada tabela registrada carregada por completo, junto dos dicts de
+    resposta e do JSON já serializado (lista e item a item). As funções criar_*
+    do crud chamam `invalidar`; cada recarga incrementa `versao`, e visões
+    derivadas (ex.: feriados de uma UF) ficam guardadas até a próxima versão.
+    Como cada processo tem sua cópia, tabelas e visões também expiram depois de
+    `ttl` segundos.
+    """
+
+    def __init__(self, ttl: float = 600.0):
+        self.ttl = ttl
+        self.versao = 0
+        self.hits = 0
+        self.misses = 0
+        self._tabelas: Dict[str, _Tabela] = {}
+        self._visoes: Dict[Hashable, tuple] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, nome: str, carregar: Callable[[Session], List[Any]],
+                  chave: Callable[[Any], Hashable], para_dict: Callable[[Any], Dict[str, Any]]) -> None:
+        """Registra uma tabela: como carregá-la, sua chave e o dict de resposta de cada item"""
+        self._tabelas[nome] = _Tabela(carregar, chave, para_dict)
+
+    def _tabela(self, nome: str) -> _Tabela:
+        tabela = self._tabelas[nome]
+        if tabela.expira_em > time.monotonic():
+            self.hits += 1
+            return tabela
+        with self._lock:
+            if tabela.expira_em > time.monotonic():
+                self.hits += 1
+                return tabela
+            self.misses += 1
+            with get_session() as session:
+                itens = list(tabela.carregar(session))
+            tabela.itens = itens
+            tabela.por_chave = {tabela.chave(item): item for item in itens}
+            tabela.dicts = [tabela.para_dict(item) for item in itens]
+            tabela.json = serializar_json(tabela.dicts)
+            tabela.json_por_chave = {
+                tabela.chave(item): serializar_json(dados) for item, dados in zip(itens, tabela.dicts)
+            }
+            tabela.expira_em = time.monotonic() + self.ttl
+            self.versao += 1
+            return tabela
+
+    def itens(self, nome: str) -> List[Any]:
+        """Objetos da tabela (somente leitura; compartilhados entre requisições)"""
+        return list(self._tabela(nome).itens)
+
+    def obter(self, nome: str, chave: Hashable) -> Optional[Any]:
+        return self._tabela(nome).por_chave.get(chave)
+
+    def dicts(self, nome: str) -> List[Dict[str, Any]]:
+        return self._tabela(nome).dicts
+
+    def json(self, nome: str) -> bytes:
+        """JSON da lista completa"""
+        return self._tabela(nome).json
+
+    def json_item(self, nome: str, chave: Hashable) -> Optional[bytes]:
+        """JSON de um item, ou None se a chave não existir"""
+        return self._tabela(nome).json_por_chave.get(chave)
+
+    def visao(self, chave: Hashable, construir: Callable[[], Any]) -> bytes:
+        """JSON de uma visão derivada das tabelas, reconstruída quando a versão muda ou expira"""
+        item = self._visoes.get(chave)
+        if item is not None and item[0] == self.versao and item[1] > time.monotonic():
+            self.hits += 1
+            return item[2]
+        self.misses += 1
+        dados = serializar_json(construir())
+        # A versão é lida depois de construir, já que a construção pode recarregar tabelas
+        self._visoes[chave] = (self.versao, time.monotonic() + self.ttl, dados)
+        return dados
+
+    def invalidar(self, nome: Optional[str] = None) -> None:
+        """Descarta uma tabela (ou todas) e as visões derivadas"""
+        with self._lock:
+            for tabela in ([self._tabelas[nome]] if nome else self._tabelas.values()):
+                tabela.expira_em = 0.0
+            self.versao += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna os contadores do cache"""
+        total = self.hits + self.misses
+        return {
+            "versao": self.versao,
+            "tabelas": {nome: len(t.itens) if t.expira_em else None for nome, t in self._tabelas.items()},
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None
+        }
+
+cache_referencias = CacheReferencias(ttl=float(os.getenv('REFERENCE_CACHE_TTL', '600')))
@@ -0,0 +1,140 @@
+"""
+Revogação de tokens JWT por jti, compartilhada entre workers pela tabela token_revogado
+"""
+import os
+import time
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import select, delete, and_, func
+from sqlalchemy.exc import IntegrityError
+
+from .models import get_session, TokenRevogado
+
+class FiltroBloom:
+    """Conjunto aproximado: `in` nunca dá falso negativo e dá falso positivo com baixa probabilidade"""
+
+    def __init__(self, bits: int = 1 << 20, hashes: int = 4):
+        self.bits = bits
+        self.hashes = hashes
+        self._bytes = bytearray((bits + 7) // 8)
+
+    def _posicoes(self, chave: str) -> Iterable[int]:
+        digest = hashlib.blake2b(chave.encode(), digest_size=4 * self.hashes).digest()
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[4 * i:4 * i + 4], 'little') % self.bits
+
+    def adicionar(self, chave: str) -> None:
+        for posicao in self._posicoes(chave):
+            self._bytes[posicao >> 3] |= 1 << (posicao & 7)
+
+    def __contains__(self, chave: str) -> bool:
+        return all(self._bytes[posicao >> 3] >> (posicao & 7) & 1 for posicao in self._posicoes(chave))
+
+class RevogacaoTokens:
+    """
+    Guarda os jti revogados na tabela token_revogado, visível a todos os workers,
+    com um filtro de Bloom local na frente: o caso comum (token não revogado) é
+    respondido sem I/O, e só um acerto no filtro consulta a tabela. A cada
+    `sincronizar_a_cada` segundos o filtro recebe as revogações feitas por outros
+    workers (uma consulta pelo índice de revogado_em); a cada `podar_a_cada`
+    segundos os tokens já expirados são apagados e o filtro é reconstruído.
+
+    revogado_em é gravado e comparado pelo relógio do banco, e cada sincronização
+    relê as revogações dos últimos `margem` segundos: uma linha gravada antes da
+    sincronização anterior, mas confirmada só depois dela, ainda é lida desde que
+    o commit não tenha demorado mais que isso. Reler um jti já presente no filtro
+    não tem efeito.
+
+    A manutenção roda no thread da requisição que encontra o prazo vencido. Só
+    esse thread espera a consulta; os demais seguem com o filtro atual enquanto
+    ela não termina (a não ser na primeira carga, que todos aguardam).
+    """
+
+    def __init__(self, bits: int = 1 << 20, hashes: int = 4,
+                 sincronizar_a_cada: float = 2.0, podar_a_cada: float = 600.0,
+                 margem: float = 60.0):
+        self.bits = bits
+        self.hashes = hashes
+        self.sincronizar_a_cada = sincronizar_a_cada
+        self.podar_a_cada = podar_a_cada
+        self.margem = margem
+        self.consultas = 0
+        self._filtro: Optional[FiltroBloom] = None
+        self._sincronizado_ate: Optional[datetime] = None
+        self._proxima_sincronizacao = 0.0
+        self._proxima_poda = 0.0
+        self._lock = threading.Lock()
+
+    def _recarregar(self, agora: datetime) -> None:
+        """Reconstrói o filtro com todos os tokens revogados ainda não expirados"""
+        filtro = FiltroBloom(self.bits, self.hashes)
+        with get_session() as session:
+            sincronizado_ate = session.execute(select(func.current_timestamp())).scalar_one()
+            for jti in session.execute(
+                select(TokenRevogado.jti).where(TokenRevogado.expira_em > agora)
+            ).scalars():
+                filtro.adicionar(jti)
+        self._filtro = filtro
+        self._sincronizado_ate = sincronizado_ate
+
+    def _manter(self) -> None:
+        relogio = time.monotonic()
+        if self._filtro is not None and relogio < self._proxima_sincronizacao:
+            return
+        if not self._lock.acquire(blocking=self._filtro is None):
+            return
+        try:
+            if self._filtro is not None and relogio < self._proxima_sincronizacao:
+                return
+            agora = datetime.utcnow()
+            if self._filtro is None or relogio >= self._proxima_poda:
+                with get_session() as session:
+                    session.execute(delete(TokenRevogado).where(TokenRevogado.expira_em <= agora))
+                    session.commit()
+                self._recarregar(agora)
+                self._proxima_poda = relogio + self.podar_a_cada
+            else:
+                desde = self._sincronizado_ate - timedelta(seconds=self.margem)
+                with get_session() as session:
+                    sincronizado_ate = session.execute(select(func.current_timestamp())).scalar_one()
+                    for jti in session.execute(
+                        select(TokenRevogado.jti).where(TokenRevogado.revogado_em >= desde)
+                    ).scalars():
+                        self._filtro.adicionar(jti)
+                self._sincronizado_ate = sincronizado_ate
+            self._proxima_sincronizacao = relogio + self.sincronizar_a_cada
+        finally:
+            self._lock.release()
+
+    def revogar(self, jti: str, expira_em: datetime) -> None:
+        """Revoga o token até `expira_em` (UTC); revogar de novo não tem efeito"""
+        self._manter()
+        try:
+            with get_session() as session:
+                session.add(TokenRevogado(jti=jti, expira_em=expira_em))
+                session.commit()
+        except IntegrityError:
+            pass
+        self._filtro.adicionar(jti)
+
+    def revogado(self, jti: str) -> bool:
+        """Indica se o token foi revogado (e ainda não expirou)"""
+        self._manter()
+        if jti not in self._filtro:
+            return False
+        self.consultas += 1
+        with get_session() as session:
+            return session.execute(
+                select(TokenRevogado.jti).where(
+                    and_(TokenRevogado.jti == jti, TokenRevogado.expira_em > datetime.utcnow()))
+            ).first() is not None
+
+revogacao_tokens = RevogacaoTokens(
+    bits=int(os.getenv('TOKEN_REVOCATION_BLOOM_BITS', str(1 << 20))),
+    sincronizar_a_cada=float(os.getenv('TOKEN_REVOCATION_SYNC_SECONDS', '2')),
+    podar_a_cada=float(os.getenv('TOKEN_REVOCATION_PRUNE_SECONDS', '600')),
+    margem=float(os.getenv('TOKEN_REVOCATION_SYNC_OVERLAP', '60'))
+)
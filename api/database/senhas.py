@@ -0,0 +1,135 @@
+"""
+Hash e verificação de senhas em um pool de processos limitado
+"""
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Abaixo disso, em lotes, o custo de distribuir entre processos supera o ganho
+MINIMO_SENHAS_POOL = 32
+
+# O pool é criado sob demanda de dentro do servidor, que tem várias threads: um
+# fork copiaria locks mantidos por outras threads e poderia travar os processos
+# filhos. O forkserver (ou spawn, onde não existe) parte de um processo limpo.
+CONTEXTO_PROCESSOS = ("forkserver" if "forkserver" in multiprocessing.get_all_start_methods()
+                      else "spawn")
+
+class FilaSenhasCheiaError(RuntimeError):
+    """Há mais hashes em andamento/espera do que o limite da fila"""
+
+class PoolSenhas:
+    """
+    Executa generate_password_hash/check_password_hash em processos separados,
+    para que o hash (CPU pura e propositalmente lenta) não segure o GIL nem a
+    thread do worker. `processos=0` executa na própria thread. No máximo
+    `limite_fila` operações ficam pendentes ao mesmo tempo; além disso
+    FilaSenhasCheiaError é levantado em vez de acumular requisições.
+    `metodo` segue o formato do Werkzeug (ex.: "scrypt:32768:8:1",
+    "pbkdf2:sha256:600000").
+    """
+
+    def __init__(self, metodo: str = "scrypt", processos: Optional[int] = None,
+                 limite_fila: Optional[int] = None, timeout: float = 30.0):
+        self.processos = (os.cpu_count() or 1) if processos is None else processos
+        self.limite_fila = limite_fila or max(self.processos, 1) * 8
+        self.timeout = timeout
+        self.metodo = metodo
+        self._prefixo: Optional[str] = None
+        self.custo_ms: Optional[float] = None
+        self._vagas = threading.BoundedSemaphore(self.limite_fila)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.processos,
+                        mp_context=multiprocessing.get_context(CONTEXTO_PROCESSOS))
+        return self._executor
+
+    @property
+    def prefixo(self) -> str:
+        """
+        Prefixo que o Werkzeug grava para o método configurado (com os parâmetros
+        padrão expandidos). Calculado no primeiro uso ou por `calibrar`, e não na
+        importação, já que exige um hash completo.
+        """
+        if self._prefixo is None:
+            self._prefixo = generate_password_hash("", self.metodo).split("$", 1)[0]
+        return self._prefixo
+
+    def redimensionar(self, processos: int) -> None:
+        """Troca a quantidade de processos (o pool atual é encerrado e recriado no próximo uso)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            self.processos = processos
+
+    def _executar(self, funcao, *args) -> Any:
+        if not self._vagas.acquire(blocking=False):
+            raise FilaSenhasCheiaError("Muitas operações de senha em andamento; tente novamente")
+        try:
+            if not self.processos:
+                return funcao(*args)
+            return self._pool().submit(funcao, *args).result(timeout=self.timeout)
+        finally:
+            self._vagas.release()
+
+    def gerar_hash(self, senha: str) -> str:
+        return self._executar(generate_password_hash, senha, self.metodo)
+
+    def verificar(self, senha_hash: str, senha: str) -> bool:
+        return self._executar(check_password_hash, senha_hash, senha)
+
+    def gerar_hashes(self, senhas: List[str]) -> List[str]:
+        """
+        Hashes de um lote, na ordem recebida (importação). Usa todo o pool sem
+        passar pelo limite da fila, que protege as requisições interativas.
+        """
+        if not self.processos or len(senhas) < MINIMO_SENHAS_POOL:
+            return [generate_password_hash(senha, self.metodo) for senha in senhas]
+        return list(self._pool().map(generate_password_hash, senhas, [self.metodo] * len(senhas),
+                                     chunksize=max(1, len(senhas) // (self.processos * 4))))
+
+    def precisa_rehash(self, senha_hash: str) -> bool:
+        """Indica se o hash foi gerado com método ou parâmetros diferentes dos atuais"""
+        return senha_hash.split("$", 1)[0] != self.prefixo
+
+    def calibrar(self, amostras: int = 3) -> Dict[str, Any]:
+        """Mede o custo de um hash nesta máquina e a vazão estimada do pool"""
+        amostras = max(amostras, 1)
+        inicio = time.perf_counter()
+        for _ in range(amostras):
+            senha_hash = generate_password_hash("calibracao", self.metodo)
+        self.custo_ms = (time.perf_counter() - inicio) * 1000 / amostras
+        self._prefixo = senha_hash.split("$", 1)[0]
+        return {
+            "metodo": self.prefixo,
+            "custo_ms": round(self.custo_ms, 1),
+            "processos": self.processos,
+            "limite_fila": self.limite_fila,
+            "hashes_por_segundo": round(max(self.processos, 1) * 1000 / self.custo_ms, 1)
+        }
+
+def _processos_configurados() -> Optional[int]:
+    valor = os.getenv('PASSWORD_HASH_WORKERS')
+    return int(valor) if valor else None
+
+pool_senhas = PoolSenhas(
+    metodo=os.getenv('PASSWORD_HASH_METHOD', 'scrypt'),
+    processos=_processos_configurados(),
+    limite_fila=int(os.getenv('PASSWORD_HASH_QUEUE_LIMIT', '0')) or None,
+    timeout=float(os.getenv('PASSWORD_HASH_TIMEOUT', '30'))
+)
+
+def gerar_hashes_senhas(senhas: List[str]) -> List[str]:
+    """Hashes das senhas, na ordem recebida, distribuídos pelo pool de processos"""
+    return pool_senhas.gerar_hashes(senhas)
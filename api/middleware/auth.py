@@ -3,28 +3,103 @@ from flask import request, jsonify, current_app, g
 from typing import Optional, Dict, Any, Callable
 import jwt
 import time
+import hashlib
+from datetime import datetime, timedelta
 
-from ..database.crud import obter_usuario, obter_grupo, obter_evento
+from ..database.crud import obter_usuario, obter_evento, obter_identidade_usuario
 from ..database.models import TipoUsuario, FlagGestor
+from ..database.cache import validacoes_claims_cache, tokens_cache
+from ..database.hierarquia import indice_hierarquia
+from ..database.revogacao import revogacao_tokens
 
-# Armazenamento simples para tokens invalidados (blacklist)
-# Em produção, isso deveria ser armazenado em Redis ou outro armazenamento persistente
-BLACKLISTED_TOKENS = set()
+class UsuarioAutenticado:
+    """Identidade do usuário autenticado, carregada uma única vez por requisição"""
+    
+    __slots__ = ('cpf', 'tipo_usuario', 'flag_gestor', 'grupo_id', 'cnpj_empresa')
+    
+    def __init__(self, cpf: int, tipo_usuario: str, flag_gestor: str,
+                 grupo_id: Optional[int], cnpj_empresa: Optional[int]):
+        self.cpf = cpf
+        self.tipo_usuario = tipo_usuario
+        self.flag_gestor = flag_gestor
+        self.grupo_id = grupo_id
+        self.cnpj_empresa = cnpj_empresa
+    
+    @classmethod
+    def de_identidade(cls, identidade) -> "UsuarioAutenticado":
+        """Cria a partir de uma linha retornada por obter_identidade_usuario"""
+        return cls(identidade.cpf, identidade.tipo_usuario, identidade.flag_gestor,
+                   identidade.grupo_id, identidade.cnpj_empresa)
+    
+    @classmethod
+    def de_claims(cls, payload: Dict[str, Any]) -> Optional["UsuarioAutenticado"]:
+        """Cria a partir das claims do access token (None se o token não trouxer a empresa)"""
+        if 'cnpj_empresa' not in payload:
+            return None
+        return cls(payload['user_cpf'], payload.get('tipo_usuario'), payload.get('flag_gestor', 'N'),
+                   payload.get('grupo_id'), payload.get('cnpj_empresa'))
+    
+    def como_tupla(self) -> tuple:
+        return (self.cpf, self.tipo_usuario, self.flag_gestor, self.grupo_id, self.cnpj_empresa)
+    
+    @property
+    def e_rh(self) -> bool:
+        return self.tipo_usuario == TipoUsuario.RH.value
+    
+    @property
+    def e_gestor(self) -> bool:
+        return self.flag_gestor == FlagGestor.SIM.value
+    
+    def __repr__(self):
+        return f"UsuarioAutenticado({self.cpf!r}, {self.tipo_usuario!r}, {self.flag_gestor!r})"
+
+def token_da_requisicao() -> Optional[str]:
+    """Token Bearer do cabeçalho Authorization, ou None"""
+    token = request.headers.get('Authorization')
+    if not token or not token.startswith('Bearer '):
+        return None
+    return token.split(' ')[1]
+
+def decodificar_token(token: str) -> Dict[str, Any]:
+    """
+    Claims verificadas do token. Na mesma requisição o token é decodificado no
+    máximo uma vez (guardado em g); entre requisições, tokens repetidos são
+    reconhecidos pelo hash e pulam a verificação da assinatura até o `exp`.
+    Levanta as mesmas exceções de jwt.decode. O payload retornado é
+    compartilhado e não deve ser alterado.
+    """
+    if g.get('token_jwt') == token:
+        return g.token_claims
+    
+    chave = hashlib.sha256(token.encode()).digest()
+    payload = tokens_cache.get(chave)
+    if payload is None:
+        payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+        validade = payload.get('exp', 0) - time.time()
+        if validade > 0:
+            tokens_cache.set(chave, payload, ttl=min(validade, tokens_cache.ttl))
+    elif payload['exp'] <= time.time():
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    
+    g.token_jwt = token
+    g.token_claims = payload
+    return payload
 
 def extrair_usuario_cpf_do_token() -> Optional[int]:
     """Extrai o CPF do usuário do token JWT"""
+    # Token já validado por jwt_required nesta requisição
+    if 'current_user_cpf' in g:
+        return g.current_user_cpf
     try:
-        token = request.headers.get('Authorization')
-        if not token or not token.startswith('Bearer '):
+        token = token_da_requisicao()
+        if not token:
             return None
         
-        token = token.split(' ')[1]
+        payload = decodificar_token(token)
         
-        # Verifica se o token está na blacklist
-        if token in BLACKLISTED_TOKENS:
+        # Verifica se o token foi revogado (logout)
+        if token_revogado(token, payload):
             return None
-            
-        payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
         return payload.get('user_cpf')  # Alterado para 'user_cpf' para corresponder ao payload em auth.py
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError, KeyError, IndexError):
         return None
@@ -34,28 +109,41 @@ def jwt_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         try:
-            token = request.headers.get('Authorization')
-            if not token or not token.startswith('Bearer '):
+            token = token_da_requisicao()
+            if not token:
                 return jsonify({"erro": "Token de acesso necessário"}), 401
             
-            token = token.split(' ')[1]
+            payload = decodificar_token(token)
             
-            # Verifica se o token está na blacklist
-            if token in BLACKLISTED_TOKENS:
+            # Verifica se o token foi revogado (logout)
+            if token_revogado(token, payload):
                 return jsonify({"erro": "Token invalidado"}), 401
-                
-            payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
             
-            # Verifica se o usuário ainda existe e está ativo
-            usuario = obter_usuario(payload['user_cpf'])  # Alterado para 'user_cpf'
-            if not usuario or not usuario.ativo:
-                return jsonify({"erro": "Usuário inválido ou inativo"}), 401
+            # Modo opcional: autoriza pelas claims, consultando o banco só periodicamente
+            usuario_claims = None
+            if current_app.config.get('JWT_CLAIMS_AUTH'):
+                usuario_claims = UsuarioAutenticado.de_claims(payload)
+            
+            if usuario_claims is not None and claims_validadas(usuario_claims):
+                usuario_autenticado = usuario_claims
+            else:
+                # Verifica se o usuário ainda existe e está ativo
+                identidade = obter_identidade_usuario(payload['user_cpf'])  # Alterado para 'user_cpf'
+                if not identidade or not identidade.ativo:
+                    return jsonify({"erro": "Usuário inválido ou inativo"}), 401
+                usuario_autenticado = UsuarioAutenticado.de_identidade(identidade)
+                
+                if usuario_claims is not None:
+                    if usuario_claims.como_tupla() != usuario_autenticado.como_tupla():
+                        return jsonify({"erro": "Permissões do usuário alteradas, renove o token"}), 401
+                    registrar_claims_validadas(usuario_claims)
             
             # Store user info in g for later use
             # Os valores já são strings no banco, não precisam de .value
+            g.usuario_autenticado = usuario_autenticado
             g.current_user_cpf = payload['user_cpf']  # Alterado para 'user_cpf'
-            g.current_user_tipo = usuario.tipo_usuario
-            g.current_user_flag_gestor = usuario.flag_gestor
+            g.current_user_tipo = usuario_autenticado.tipo_usuario
+            g.current_user_flag_gestor = usuario_autenticado.flag_gestor
             
             return f(*args, **kwargs)
         except jwt.ExpiredSignatureError:
@@ -69,11 +157,37 @@ def jwt_required(f):
     
     return decorated
 
-def invalidate_token(token):
-    """Adiciona um token à blacklist"""
+def claims_validadas(usuario: UsuarioAutenticado) -> bool:
+    """Indica se estas claims foram conferidas contra o banco dentro do intervalo de revalidação"""
+    return validacoes_claims_cache.get(usuario.cpf) == usuario.como_tupla()
+
+def registrar_claims_validadas(usuario: UsuarioAutenticado) -> None:
+    """Marca as claims como conferidas até o próximo intervalo de revalidação"""
+    validacoes_claims_cache.set(usuario.cpf, usuario.como_tupla(),
+                                ttl=current_app.config.get('JWT_CLAIMS_REVALIDATE_SECONDS'))
+
+def identificador_token(token: str, payload: Dict[str, Any]) -> str:
+    """jti do token; tokens emitidos antes do jti são identificados pelo hash do próprio token"""
+    return payload.get('jti') or hashlib.sha256(token.encode()).hexdigest()
+
+def token_revogado(token: str, payload: Dict[str, Any]) -> bool:
+    """Indica se o token (já decodificado) foi revogado"""
+    return revogacao_tokens.revogado(identificador_token(token, payload))
+
+def invalidate_token(token, payload: Optional[Dict[str, Any]] = None):
+    """
+    Revoga um token até sua expiração, em todos os workers. `payload` são as
+    claims já verificadas (ex.: g.token_claims do jwt_required); sem elas o token
+    é decodificado aqui, aceitando tokens já expirados.
+    """
     if token and token.startswith('Bearer '):
         token = token.split(' ')[1]
-    BLACKLISTED_TOKENS.add(token)
+    if payload is None:
+        payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'],
+                             options={"verify_exp": False})
+    expira_em = (datetime.utcfromtimestamp(payload['exp']) if 'exp' in payload
+                 else datetime.utcnow() + timedelta(days=7))
+    revogacao_tokens.revogar(identificador_token(token, payload), expira_em)
     return True
 
 def get_current_user():
@@ -82,6 +196,22 @@ def get_current_user():
         return obter_usuario(g.current_user_cpf)
     return None
 
+def get_usuario_autenticado() -> Optional[UsuarioAutenticado]:
+    """Retorna a identidade do usuário autenticado na requisição atual"""
+    return g.get('usuario_autenticado')
+
+def obter_identidade(usuario_cpf: int) -> Optional[UsuarioAutenticado]:
+    """
+    Reaproveita a identidade da requisição quando o CPF é o do usuário autenticado;
+    para os demais usuários usa o cache de identidades (por CPF, validade de
+    IDENTITY_CACHE_TTL, descartado pelas escritas de usuário deste worker)
+    """
+    autenticado = get_usuario_autenticado()
+    if autenticado is not None and autenticado.cpf == usuario_cpf:
+        return autenticado
+    identidade = obter_identidade_usuario(usuario_cpf)
+    return UsuarioAutenticado.de_identidade(identidade) if identidade else None
+
 def get_current_user_cpf() -> Optional[int]:
     """Retorna o CPF do usuário atual"""
     return getattr(g, 'current_user_cpf', None)
@@ -145,10 +275,8 @@ def requer_permissao_usuario(f):
             
             # Para operações DELETE, verificar se é RH ou gestor
             if request.method == 'DELETE':
-                from ..database.crud import obter_usuario
-                usuario = obter_usuario(usuario_cpf)
-                if usuario and (usuario.tipo_usuario == TipoUsuario.RH.value or 
-                               usuario.flag_gestor == FlagGestor.SIM.value):
+                usuario = obter_identidade(usuario_cpf)
+                if usuario and (usuario.e_rh or usuario.e_gestor):
                     # RH e gestores podem deletar usuários (verificação adicional no handler)
                     return f(*args, **kwargs)
             
@@ -190,26 +318,22 @@ def requer_permissao_evento(f):
 
 def verificar_permissao_usuario_target(usuario_cpf: int, target_cpf: int) -> bool:
     """Verifica se o usuário tem permissão para acessar dados de outro usuário"""
-    usuario = obter_usuario(usuario_cpf)
+    usuario = obter_identidade(usuario_cpf)
     if not usuario:
         return False
     
     # RH pode acessar qualquer usuário da mesma empresa
-    # Compara com string diretamente (não enum)
-    if usuario.tipo_usuario == TipoUsuario.RH.value:
-        target_usuario = obter_usuario(target_cpf)
+    if usuario.e_rh:
+        target_usuario = obter_identidade(target_cpf)
         if target_usuario and target_usuario.grupo_id and usuario.grupo_id:
             # Verifica se ambos pertencem à mesma empresa
-            grupo_usuario = obter_grupo(usuario.grupo_id)
-            grupo_target = obter_grupo(target_usuario.grupo_id)
-            if grupo_usuario and grupo_target:
-                return grupo_usuario.cnpj_empresa == grupo_target.cnpj_empresa
+            if usuario.cnpj_empresa and target_usuario.cnpj_empresa:
+                return usuario.cnpj_empresa == target_usuario.cnpj_empresa
         return False
     
     # Gestores podem acessar usuários do mesmo grupo
-    # Compara com string diretamente (não enum)
-    if usuario.flag_gestor == FlagGestor.SIM.value:
-        target_usuario = obter_usuario(target_cpf)
+    if usuario.e_gestor:
+        target_usuario = obter_identidade(target_cpf)
         if target_usuario:
             return target_usuario.grupo_id == usuario.grupo_id
         return False
@@ -219,65 +343,59 @@ def verificar_permissao_usuario_target(usuario_cpf: int, target_cpf: int) -> boo
 
 def verificar_permissao_grupo(usuario_cpf: int, grupo_id: int) -> bool:
     """Verifica se o usuário tem permissão para gerenciar um grupo"""
-    usuario = obter_usuario(usuario_cpf)
+    usuario = obter_identidade(usuario_cpf)
     if not usuario:
         return False
     
     # RH pode gerenciar qualquer grupo da mesma empresa
-    if usuario.tipo_usuario == TipoUsuario.RH.value:
-        if not usuario.grupo_id:
+    if usuario.e_rh:
+        if not usuario.grupo_id or not usuario.cnpj_empresa:
             return False
-        grupo_usuario = obter_grupo(usuario.grupo_id)
-        grupo_target = obter_grupo(grupo_id)
-        if grupo_usuario and grupo_target:
-            return grupo_usuario.cnpj_empresa == grupo_target.cnpj_empresa
+        cnpj_grupo = indice_hierarquia.empresa_do_grupo(grupo_id)
+        if cnpj_grupo:
+            return usuario.cnpj_empresa == cnpj_grupo
         return False
     
     # Gestores podem gerenciar apenas seu próprio grupo
-    if usuario.flag_gestor == FlagGestor.SIM.value:
+    if usuario.e_gestor:
         return usuario.grupo_id == grupo_id
     
     return False
 
 def verificar_permissao_empresa(usuario_cpf: int, cnpj_empresa: int) -> bool:
     """Verifica se o usuário tem permissão para acessar dados de uma empresa"""
-    usuario = obter_usuario(usuario_cpf)
+    usuario = obter_identidade(usuario_cpf)
     if not usuario:
         return False
     
     # RH só pode acessar sua própria empresa
-    if usuario.tipo_usuario == TipoUsuario.RH.value:
-        if not usuario.grupo_id:
+    if usuario.e_rh:
+        if not usuario.grupo_id or not usuario.cnpj_empresa:
             return False
-        grupo = obter_grupo(usuario.grupo_id)
-        if grupo:
-            return grupo.cnpj_empresa == cnpj_empresa
-        return False
+        return usuario.cnpj_empresa == cnpj_empresa
     
     return False
 
 def get_empresa_do_usuario_rh(usuario_cpf: int) -> Optional[int]:
     """Retorna o CNPJ da empresa do usuário RH"""
-    usuario = obter_usuario(usuario_cpf)
-    if not usuario or usuario.tipo_usuario != TipoUsuario.RH.value:
+    usuario = obter_identidade(usuario_cpf)
+    if not usuario or not usuario.e_rh:
         return None
     
-    grupo = obter_grupo(usuario.grupo_id)
-    return grupo.cnpj_empresa if grupo else None
+    return usuario.cnpj_empresa
 
 def filtrar_por_escopo_usuario(usuario_cpf: int) -> Optional[Dict[str, Any]]:
     """Retorna filtros baseados no escopo do usuário"""
-    usuario = obter_usuario(usuario_cpf)
+    usuario = obter_identidade(usuario_cpf)
     if not usuario:
         return None
     
     # RH vê dados da empresa
-    if usuario.tipo_usuario == TipoUsuario.RH.value:
-        grupo = obter_grupo(usuario.grupo_id)
-        return {"cnpj_empresa": grupo.cnpj_empresa} if grupo else None
+    if usuario.e_rh:
+        return {"cnpj_empresa": usuario.cnpj_empresa} if usuario.cnpj_empresa else None
     
     # Gestores veem dados do grupo
-    if usuario.flag_gestor == FlagGestor.SIM.value:
+    if usuario.e_gestor:
         return {"grupo_id": usuario.grupo_id}
     
     # Usuários comuns veem apenas próprios dados
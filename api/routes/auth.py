@@ -1,17 +1,25 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g
 from typing import Dict, Any
 import jwt
 import datetime
 import os
+import uuid
 
-from ..database.crud import autenticar_usuario, usuario_para_dict, obter_usuario
-from ..middleware.auth import jwt_required, get_current_user, invalidate_token
+from ..database.crud import autenticar_usuario, usuario_para_dict, obter_usuario, obter_identidade_usuario
+from ..database.senhas import FilaSenhasCheiaError
+from ..middleware.auth import jwt_required, get_current_user, invalidate_token, token_revogado
 
 auth_bp = Blueprint('auth', __name__)
 
 def generate_tokens(usuario):
     """Gera tokens de acesso e refresh para o usuário"""
     secret_key = current_app.config.get('SECRET_KEY', os.getenv('SECRET_KEY', 'fallback-secret-key'))
+    if 'cnpj_empresa' in getattr(usuario, '_fields', ()):
+        # Linha de autenticar_usuario, que já traz a empresa do grupo
+        cnpj_empresa = usuario.cnpj_empresa
+    else:
+        identidade = obter_identidade_usuario(usuario.cpf)
+        cnpj_empresa = identidade.cnpj_empresa if identidade else None
     
     # Token de acesso (1 hora)
     access_payload = {
@@ -21,8 +29,10 @@ def generate_tokens(usuario):
         'flag_gestor': usuario.flag_gestor,
         'grupo_id': usuario.grupo_id,
         'uf': usuario.UF,
+        'cnpj_empresa': cnpj_empresa,
         'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1),
         'iat': datetime.datetime.utcnow(),
+        'jti': uuid.uuid4().hex,
         'type': 'access'
     }
     
@@ -31,6 +41,7 @@ def generate_tokens(usuario):
         'user_cpf': usuario.cpf,
         'exp': datetime.datetime.utcnow() + datetime.timedelta(days=7),
         'iat': datetime.datetime.utcnow(),
+        'jti': uuid.uuid4().hex,
         'type': 'refresh'
     }
     
@@ -50,7 +61,10 @@ def login():
         return jsonify({"erro": "Email e senha são obrigatórios"}), 400
     
     try:
-        usuario = autenticar_usuario(email, senha)
+        try:
+            usuario = autenticar_usuario(email, senha)
+        except FilaSenhasCheiaError as fe:
+            return jsonify({"erro": str(fe)}), 503, {'Retry-After': '1'}
         if usuario is None:
             return jsonify({"autenticado": False, "erro": "Credenciais inválidas"}), 401
         
@@ -81,7 +95,7 @@ def refresh():
         secret_key = current_app.config.get('SECRET_KEY', os.getenv('SECRET_KEY', 'fallback-secret-key'))
         payload = jwt.decode(refresh_token, secret_key, algorithms=['HS256'])
         
-        if payload.get('type') != 'refresh':
+        if payload.get('type') != 'refresh' or token_revogado(refresh_token, payload):
             return jsonify({"erro": "Token inválido"}), 401
         
         # Buscar usuário
@@ -108,9 +122,17 @@ def refresh():
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required
 def logout():
-    """Logout (invalidar token)"""
-    token = request.headers.get('Authorization')
-    invalidate_token(token)
+    """Logout (invalida o access token e, se enviado, o refresh token)"""
+    # Claims já verificadas pelo jwt_required; só o refresh token é decodificado aqui
+    invalidate_token(g.token_jwt, g.token_claims)
+    
+    dados = request.get_json(silent=True) or {}
+    refresh_token = dados.get('refresh_token')
+    if refresh_token:
+        try:
+            invalidate_token(refresh_token)
+        except jwt.InvalidTokenError:
+            return jsonify({"erro": "Refresh token inválido"}), 400
     return jsonify({"message": "Logout realizado com sucesso"}), 200
 
 @auth_bp.route('/me', methods=['GET'])
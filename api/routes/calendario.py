@@ -1,19 +1,27 @@
 from flask import Blueprint, request, jsonify
-from typing import Dict, Any
-from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+from datetime import date, datetime, timedelta
 
 from ..database.crud import (
     listar_eventos, obter_evento, obter_grupo,
-    obter_usuario, obter_tipo_ausencia
+    obter_usuario, obter_tipo_ausencia, separar_pagina, escopos_listagem,
+    matriz_disponibilidade
 )
+from ..database.disponibilidade import CODIFICADORES, CODIFICACAO_RLE
 from ..middleware.auth import (
     jwt_required, filtrar_por_escopo_usuario,
     extrair_usuario_cpf_do_token, verificar_permissao_grupo, 
     verificar_permissao_usuario_target
 )
 
+from .paginacao import obter_parametros_paginacao, cabecalhos_paginacao
+from .condicional import verificar_etag, cabecalhos_etag
+
 calendario_bp = Blueprint('calendario', __name__)
 
+# Limite da janela da matriz de disponibilidade
+DIAS_MAXIMOS_DISPONIBILIDADE = 366
+
 def evento_para_calendario(evento: Any) -> Dict[str, Any]:
     """Converte um evento para o formato do calendário"""
     tipo_ausencia = obter_tipo_ausencia(evento.id_tipo_ausencia)
@@ -63,38 +71,12 @@ def evento_para_calendario(evento: Any) -> Dict[str, Any]:
         }
     }
 
-def filtrar_eventos_por_data(eventos, inicio=None, fim=None):
-    """Filtra eventos por data"""
-    if not inicio and not fim:
-        return eventos
-    
-    eventos_filtrados = []
-    for evento in eventos:
-        # Converte datas do evento para datetime se necessário
-        if isinstance(evento.data_inicio, str):
-            evento_inicio = datetime.fromisoformat(evento.data_inicio)
-        else:
-            evento_inicio = datetime.combine(evento.data_inicio, datetime.min.time())
-        
-        if isinstance(evento.data_fim, str):
-            evento_fim = datetime.fromisoformat(evento.data_fim)
-        else:
-            evento_fim = datetime.combine(evento.data_fim, datetime.min.time())
-        
-        # Verifica se o evento está no período solicitado
-        if inicio:
-            inicio_obj = datetime.fromisoformat(inicio)
-            if evento_fim < inicio_obj:
-                continue
-        
-        if fim:
-            fim_obj = datetime.fromisoformat(fim)
-            if evento_inicio > fim_obj:
-                continue
-        
-        eventos_filtrados.append(evento)
-    
-    return eventos_filtrados
+def parse_janela_datas(inicio: Optional[str], fim: Optional[str]) -> Tuple[Optional[date], Optional[date]]:
+    """Converte os parâmetros inicio/fim (YYYY-MM-DD) em datas, uma única vez por requisição"""
+    return (
+        datetime.fromisoformat(inicio).date() if inicio else None,
+        datetime.fromisoformat(fim).date() if fim else None
+    )
 
 @calendario_bp.route('', methods=['GET'])
 @jwt_required
@@ -106,10 +88,13 @@ def listar_calendario():
             return jsonify({"erro": "Token de autenticação necessário"}), 401
         
         # Parâmetros de filtro
-        inicio = request.args.get('inicio')
-        fim = request.args.get('fim')
+        try:
+            inicio, fim = parse_janela_datas(request.args.get('inicio'), request.args.get('fim'))
+        except ValueError:
+            return jsonify({"erro": "Formato de data inválido. Use YYYY-MM-DD"}), 400
         tipo_ausencia = request.args.get('tipo_ausencia', type=int)
         status = request.args.get('status')
+        limit, cursor = obter_parametros_paginacao()
         
         # Aplica filtros baseados no escopo do usuário
         filtros = filtrar_por_escopo_usuario(usuario_cpf)
@@ -117,32 +102,36 @@ def listar_calendario():
         # Determina os filtros baseados no escopo
         if filtros and 'cpf_usuario' in filtros:
             # Usuário comum vê apenas seus próprios eventos
-            cpf_usuario = filtros['cpf_usuario']
-            eventos = listar_eventos(
-                cpf_usuario=cpf_usuario,
-                status=status
-            )
+            escopo = {"cpf_usuario": filtros['cpf_usuario']}
         elif filtros and 'grupo_id' in filtros:
             # Gestor vê eventos do seu grupo
-            grupo_id = filtros['grupo_id']
-            eventos = listar_eventos(
-                grupo_id=grupo_id,
-                status=status
-            )
+            escopo = {"grupo_id": filtros['grupo_id']}
         elif filtros and 'cnpj_empresa' in filtros:
-            # RH vê eventos da empresa - lista todos os eventos e filtra depois
-            eventos = listar_eventos(status=status)
+            # RH vê eventos da empresa
+            escopo = {"cnpj_empresa": filtros['cnpj_empresa']}
         else:
             return jsonify([]), 200
         
-        # Filtra por data se especificado
-        eventos = filtrar_eventos_por_data(eventos, inicio, fim)
+        etag, nao_modificado = verificar_etag(escopos_listagem(**escopo), usuario_cpf)
+        if nao_modificado:
+            return nao_modificado
         
-        # Filtra por tipo de ausência se especificado
-        if tipo_ausencia:
-            eventos = [e for e in eventos if e.id_tipo_ausencia == tipo_ausencia]
+        eventos = listar_eventos(
+            **escopo,
+            status=status,
+            inicio=inicio,
+            fim=fim,
+            id_tipo_ausencia=tipo_ausencia,
+            limit=limit,
+            cursor=cursor
+        )
+        eventos, proximo_cursor = separar_pagina(eventos, limit, lambda e: (e.data_inicio, e.id))
         
-        return jsonify([evento_para_calendario(e) for e in eventos]), 200
+        return jsonify([evento_para_calendario(e) for e in eventos]), 200, {
+            **cabecalhos_paginacao(proximo_cursor), **cabecalhos_etag(etag)
+        }
+    except ValueError as ve:
+        return jsonify({"erro": f"Valor inválido: {ve}"}), 400
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -160,28 +149,88 @@ def listar_calendario_grupo(grupo_id: int):
             return jsonify({"erro": "Sem permissão para acessar dados deste grupo"}), 403
         
         # Parâmetros de filtro
-        inicio = request.args.get('inicio')
-        fim = request.args.get('fim')
+        try:
+            inicio, fim = parse_janela_datas(request.args.get('inicio'), request.args.get('fim'))
+        except ValueError:
+            return jsonify({"erro": "Formato de data inválido. Use YYYY-MM-DD"}), 400
         tipo_ausencia = request.args.get('tipo_ausencia', type=int)
         status = request.args.get('status')
+        limit, cursor = obter_parametros_paginacao()
+        
+        etag, nao_modificado = verificar_etag(escopos_listagem(grupo_id=grupo_id), usuario_cpf)
+        if nao_modificado:
+            return nao_modificado
         
         eventos = listar_eventos(
             grupo_id=grupo_id,
-            status=status
+            status=status,
+            inicio=inicio,
+            fim=fim,
+            id_tipo_ausencia=tipo_ausencia,
+            limit=limit,
+            cursor=cursor
         )
-        
-        # Filtra por data se especificado
-        eventos = filtrar_eventos_por_data(eventos, inicio, fim)
-        
-        # Filtra por tipo de ausência se especificado
-        if tipo_ausencia:
-            eventos = [e for e in eventos if e.id_tipo_ausencia == tipo_ausencia]
+        eventos, proximo_cursor = separar_pagina(eventos, limit, lambda e: (e.data_inicio, e.id))
         
         return jsonify({
             "grupo_id": grupo_id,
             "total_eventos": len(eventos),
             "eventos": [evento_para_calendario(e) for e in eventos]
-        }), 200
+        }), 200, {**cabecalhos_paginacao(proximo_cursor), **cabecalhos_etag(etag)}
+    except ValueError as ve:
+        return jsonify({"erro": f"Valor inválido: {ve}"}), 400
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@calendario_bp.route('/grupo/<int:grupo_id>/disponibilidade', methods=['GET'])
+@jwt_required
+def disponibilidade_grupo(grupo_id: int):
+    """Matriz usuários × dias com as ausências de um grupo em uma janela de datas"""
+    try:
+        usuario_cpf = extrair_usuario_cpf_do_token()
+        if not usuario_cpf:
+            return jsonify({"erro": "Token de autenticação necessário"}), 401
+        
+        if not verificar_permissao_grupo(usuario_cpf, grupo_id):
+            return jsonify({"erro": "Sem permissão para acessar dados deste grupo"}), 403
+        
+        try:
+            inicio, fim = parse_janela_datas(request.args.get('inicio'), request.args.get('fim'))
+        except ValueError:
+            return jsonify({"erro": "Formato de data inválido. Use YYYY-MM-DD"}), 400
+        if not inicio or not fim:
+            return jsonify({"erro": "Parâmetros inicio e fim são obrigatórios"}), 400
+        dias = (fim - inicio).days + 1
+        if dias < 1 or dias > DIAS_MAXIMOS_DISPONIBILIDADE:
+            return jsonify({"erro": f"A janela deve ter entre 1 e {DIAS_MAXIMOS_DISPONIBILIDADE} dias"}), 400
+        
+        codificacao = request.args.get('codificacao', CODIFICACAO_RLE)
+        if codificacao not in CODIFICADORES:
+            return jsonify({"erro": f"codificacao deve ser uma de: {', '.join(CODIFICADORES)}"}), 400
+        codificar = CODIFICADORES[codificacao]
+        status = request.args.get('status')
+        
+        etag, nao_modificado = verificar_etag(escopos_listagem(grupo_id=grupo_id), usuario_cpf)
+        if nao_modificado:
+            return nao_modificado
+        
+        usuarios = matriz_disponibilidade(grupo_id, inicio, fim, status=status)
+        
+        return jsonify({
+            "grupo_id": grupo_id,
+            "inicio": inicio.isoformat(),
+            "fim": fim.isoformat(),
+            "dias": dias,
+            "codificacao": codificacao,
+            "usuarios": [{
+                "cpf": u["cpf"],
+                "nome": u["nome"],
+                "dias_ausente": u["mascara"].bit_count(),
+                "ausencias": codificar(u["mascara"], dias)
+            } for u in usuarios]
+        }), 200, cabecalhos_etag(etag)
+    except ValueError as ve:
+        return jsonify({"erro": f"Valor inválido: {ve}"}), 400
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -199,22 +248,28 @@ def listar_calendario_usuario(cpf_usuario: int):
             return jsonify({"erro": "Sem permissão para acessar dados deste usuário"}), 403
         
         # Parâmetros de filtro
-        inicio = request.args.get('inicio')
-        fim = request.args.get('fim')
+        try:
+            inicio, fim = parse_janela_datas(request.args.get('inicio'), request.args.get('fim'))
+        except ValueError:
+            return jsonify({"erro": "Formato de data inválido. Use YYYY-MM-DD"}), 400
         tipo_ausencia = request.args.get('tipo_ausencia', type=int)
         status = request.args.get('status')
+        limit, cursor = obter_parametros_paginacao()
+        
+        etag, nao_modificado = verificar_etag(escopos_listagem(cpf_usuario=cpf_usuario), usuario_cpf)
+        if nao_modificado:
+            return nao_modificado
         
         eventos = listar_eventos(
             cpf_usuario=cpf_usuario,
-            status=status
+            status=status,
+            inicio=inicio,
+            fim=fim,
+            id_tipo_ausencia=tipo_ausencia,
+            limit=limit,
+            cursor=cursor
         )
-        
-        # Filtra por data se especificado
-        eventos = filtrar_eventos_por_data(eventos, inicio, fim)
-        
-        # Filtra por tipo de ausência se especificado
-        if tipo_ausencia:
-            eventos = [e for e in eventos if e.id_tipo_ausencia == tipo_ausencia]
+        eventos, proximo_cursor = separar_pagina(eventos, limit, lambda e: (e.data_inicio, e.id))
         
         usuario = obter_usuario(cpf_usuario)
         nome_usuario = usuario.nome if usuario else "Usuário Desconhecido"
@@ -224,6 +279,8 @@ def listar_calendario_usuario(cpf_usuario: int):
             "nome_usuario": nome_usuario,
             "total_eventos": len(eventos),
             "eventos": [evento_para_calendario(e) for e in eventos]
-        }), 200
+        }), 200, {**cabecalhos_paginacao(proximo_cursor), **cabecalhos_etag(etag)}
+    except ValueError as ve:
+        return jsonify({"erro": f"Valor inválido: {ve}"}), 400
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
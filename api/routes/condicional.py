@@ -0,0 +1,26 @@
+"""
+GETs condicionais (ETag / If-None-Match) das listagens, a partir das versões por escopo
+"""
+import hashlib
+from typing import Dict, List, Optional, Tuple
+from flask import Response, request
+
+from ..database.crud import versoes_escopos
+
+def verificar_etag(escopos: List[tuple], usuario_cpf: int) -> Tuple[str, Optional[Response]]:
+    """
+    Calcula o ETag fraco da listagem (usuário, rota, parâmetros, escopos e suas
+    versões) e retorna a resposta 304 quando o cliente já tem essa versão. Custa
+    uma consulta à tabela de versões, sem tocar nos eventos.
+    """
+    versoes = versoes_escopos(escopos)
+    # O usuário entra na assinatura porque a mesma rota filtra por perfil
+    assinatura = repr((usuario_cpf, request.path, sorted(request.args.items(multi=True)), escopos, versoes))
+    etag = hashlib.sha1(assinatura.encode()).hexdigest()[:20]
+    if request.if_none_match.contains_weak(etag):
+        return etag, Response(status=304, headers=cabecalhos_etag(etag))
+    return etag, None
+
+def cabecalhos_etag(etag: str) -> Dict[str, str]:
+    """ETag e Cache-Control que obrigam o navegador a revalidar a cada uso"""
+    return {'ETag': f'W/"{etag}"', 'Cache-Control': 'private, no-cache'}
@@ -3,29 +3,22 @@ from typing import Dict, Any
 from sqlalchemy.exc import IntegrityError
 
 from ..database.crud import (
-    obter_empresa, atualizar_empresa, empresa_para_dict,
-    obter_usuario, obter_grupo
+    obter_empresa, atualizar_empresa, empresa_para_dict
 )
 from ..middleware.auth import (
-    jwt_required, extrair_usuario_cpf_do_token
+    jwt_required, extrair_usuario_cpf_do_token, get_usuario_autenticado,
+    get_empresa_do_usuario_rh as get_cnpj_empresa_do_usuario_rh
 )
 
 empresas_bp = Blueprint('empresas', __name__)
 
 def get_empresa_do_usuario_rh(usuario_cpf: int):
     """Retorna a empresa do usuário RH baseado no seu grupo"""
-    usuario = obter_usuario(usuario_cpf)
-    if not usuario or usuario.tipo_usuario != 'rh':
+    cnpj_empresa = get_cnpj_empresa_do_usuario_rh(usuario_cpf)
+    if not cnpj_empresa:
         return None
     
-    if not usuario.grupo_id:
-        return None
-    
-    grupo = obter_grupo(usuario.grupo_id)
-    if not grupo:
-        return None
-    
-    return obter_empresa(grupo.cnpj_empresa)
+    return obter_empresa(cnpj_empresa)
 
 @empresas_bp.route('', methods=['GET'])
 @jwt_required
@@ -36,7 +29,7 @@ def listar():
         if not usuario_cpf:
             return jsonify({"erro": "Token de autenticação necessário"}), 401
         
-        usuario = obter_usuario(usuario_cpf)
+        usuario = get_usuario_autenticado()
         if not usuario or usuario.tipo_usuario != 'rh':
             return jsonify({"erro": "Apenas RH pode acessar dados de empresas"}), 403
         
@@ -59,7 +52,7 @@ def obter(cnpj: int):
         if not usuario_cpf:
             return jsonify({"erro": "Token de autenticação necessário"}), 401
         
-        usuario = obter_usuario(usuario_cpf)
+        usuario = get_usuario_autenticado()
         if not usuario or usuario.tipo_usuario != 'rh':
             return jsonify({"erro": "Apenas RH pode acessar dados de empresas"}), 403
         
@@ -93,7 +86,7 @@ def atualizar(cnpj: int):
         if not usuario_cpf:
             return jsonify({"erro": "Token de autenticação necessário"}), 401
             
-        usuario = obter_usuario(usuario_cpf)
+        usuario = get_usuario_autenticado()
         if not usuario or usuario.tipo_usuario != 'rh':
             return jsonify({"erro": "Apenas RH pode atualizar dados de empresas"}), 403
         
@@ -2,16 +2,22 @@ from flask import Blueprint, request, jsonify
 from typing import Dict, Any
 
 from ..database.crud import (
-  criar_evento, listar_eventos, obter_evento,
+  criar_evento, listar_eventos_projetados, obter_evento,
   atualizar_evento, deletar_evento, evento_para_dict,
-  aprovar_evento, rejeitar_evento, obter_usuario
+  aprovar_evento, rejeitar_evento, separar_pagina, iterar_eventos_projetados,
+  escopos_listagem, ConflitoEventoError, decidir_eventos_lote, LIMITE_LOTE_DECISAO
 )
 from ..database.models import TipoUsuario, FlagGestor, StatusEvento, get_session
 from ..middleware.auth import (
   jwt_required, requer_permissao_evento, filtrar_por_escopo_usuario,
-  extrair_usuario_cpf_do_token, verificar_permissao_usuario_target
+  extrair_usuario_cpf_do_token, verificar_permissao_usuario_target,
+  get_usuario_autenticado, obter_identidade
 )
 
+from .paginacao import obter_parametros_paginacao, cabecalhos_paginacao
+from .exportacao import obter_formato_streaming, resposta_streaming
+from .condicional import verificar_etag, cabecalhos_etag
+
 eventos_bp = Blueprint('eventos', __name__)
 
 @eventos_bp.route('', methods=['GET'])
@@ -26,17 +32,21 @@ def listar():
       usuario_target_cpf = request.args.get('cpf_usuario', type=int)
       grupo_id = request.args.get('grupo_id', type=int)
       status = request.args.get('status')
+      limit, cursor = obter_parametros_paginacao()
+      formato_streaming = obter_formato_streaming()
       
       # Aplica filtros baseados no escopo do usuário
       filtros = filtrar_por_escopo_usuario(usuario_cpf)
       
       # Determina os filtros baseados no escopo
+      cnpj_empresa = None
       if filtros and 'grupo_id' in filtros:
           # Gestores e usuários comuns veem eventos do seu grupo
           grupo_id_final = filtros['grupo_id']
       elif filtros and 'cnpj_empresa' in filtros:
           # RH pode especificar grupo ou ver todos da empresa
           grupo_id_final = grupo_id
+          cnpj_empresa = filtros['cnpj_empresa']
       else:
           return jsonify([]), 200
       
@@ -44,13 +54,35 @@ def listar():
       if usuario_target_cpf and not verificar_permissao_usuario_target(usuario_cpf, usuario_target_cpf):
           return jsonify({"erro": "Sem permissão para ver eventos deste usuário"}), 403
       
-      eventos = listar_eventos(
+      etag, nao_modificado = verificar_etag(
+          escopos_listagem(grupo_id=grupo_id_final, cnpj_empresa=cnpj_empresa), usuario_cpf)
+      if nao_modificado:
+          return nao_modificado
+      
+      if formato_streaming:
+          # Exportação completa do escopo, sem paginação
+          resposta = resposta_streaming(iterar_eventos_projetados(
+              cpf_usuario=usuario_target_cpf,
+              grupo_id=grupo_id_final,
+              status=status,
+              cnpj_empresa=cnpj_empresa
+          ), formato_streaming)
+          resposta.headers.update(cabecalhos_etag(etag))
+          return resposta
+      
+      eventos = listar_eventos_projetados(
           cpf_usuario=usuario_target_cpf,
           grupo_id=grupo_id_final,
-          status=status
+          status=status,
+          cnpj_empresa=cnpj_empresa,
+          limit=limit,
+          cursor=cursor
       )
+      eventos, proximo_cursor = separar_pagina(eventos, limit, lambda e: (e["data_inicio"], e["id"]))
       
-      return jsonify([evento_para_dict(e) for e in eventos]), 200
+      return jsonify(eventos), 200, {**cabecalhos_paginacao(proximo_cursor), **cabecalhos_etag(etag)}
+  except ValueError as ve:
+      return jsonify({"erro": f"Valor inválido: {ve}"}), 400
   except Exception as e:
       return jsonify({"erro": str(e)}), 500
 
@@ -91,7 +123,7 @@ def criar():
           return jsonify({"erro": "Sem permissão para criar eventos para este usuário"}), 403
       
       # Usuários comuns só podem criar eventos para si mesmos
-      usuario_logado = obter_usuario(usuario_cpf)
+      usuario_logado = get_usuario_autenticado()
       if (usuario_logado and usuario_logado.tipo_usuario == TipoUsuario.COMUM.value and 
           usuario_logado.flag_gestor == FlagGestor.NAO.value and usuario_cpf != cpf_usuario):
           return jsonify({"erro": "Usuários comuns só podem criar eventos próprios"}), 403
@@ -131,6 +163,8 @@ def criar():
           
   except KeyError as ke:
       return jsonify({"erro": f"Parâmetro ausente: {ke}"}), 400
+  except ConflitoEventoError as ce:
+      return jsonify({"erro": str(ce), "conflitos": ce.conflitos}), 409
   except ValueError as ve:
       return jsonify({"erro": f"Valor inválido: {ve}"}), 400
   except Exception as e:
@@ -169,7 +203,7 @@ def atualizar(evento_id: int):
           return jsonify({"erro": "Token de autenticação necessário"}), 401
           
       evento = obter_evento(evento_id)
-      usuario_logado = obter_usuario(usuario_cpf)
+      usuario_logado = get_usuario_autenticado()
       
       if not evento or not usuario_logado:
           return jsonify({"erro": "Evento ou usuário não encontrado"}), 404
@@ -183,6 +217,8 @@ def atualizar(evento_id: int):
       if not sucesso:
           return jsonify({"erro": "Evento não encontrado"}), 404
       return jsonify({"status": "Evento atualizado"}), 200
+  except ConflitoEventoError as ce:
+      return jsonify({"erro": str(ce), "conflitos": ce.conflitos}), 409
   except ValueError as ve:
       return jsonify({"erro": f"Valor inválido: {ve}"}), 400
   except Exception as e:
@@ -198,7 +234,7 @@ def deletar(evento_id: int):
           return jsonify({"erro": "Token de autenticação necessário"}), 401
 
       evento = obter_evento(evento_id)
-      usuario_logado = obter_usuario(usuario_cpf)
+      usuario_logado = get_usuario_autenticado()
 
       if not evento or not usuario_logado:
           return jsonify({"erro": "Evento ou usuário não encontrado"}), 404
@@ -233,7 +269,7 @@ def aprovar(evento_id: int):
       aprovador_cpf = dados["aprovador_cpf"]
       
       # Verifica se o aprovador existe e tem permissão
-      aprovador = obter_usuario(aprovador_cpf)
+      aprovador = obter_identidade(aprovador_cpf)
       if not aprovador:
           return jsonify({"erro": "Aprovador não encontrado"}), 404
       
@@ -243,8 +279,7 @@ def aprovar(evento_id: int):
           return jsonify({"erro": "Evento não encontrado"}), 404
       
       # Verifica permissão para aprovar
-      if (aprovador.tipo_usuario not in [TipoUsuario.RH.value] and 
-          aprovador.flag_gestor != FlagGestor.SIM.value):
+      if not aprovador.e_rh and not aprovador.e_gestor:
           return jsonify({"erro": "Sem permissão para aprovar eventos"}), 403
       
       # Verifica se o aprovador pode aprovar eventos deste usuário
@@ -272,7 +307,7 @@ def rejeitar(evento_id: int):
       aprovador_cpf = dados["aprovador_cpf"]
       
       # Verifica se o aprovador existe e tem permissão
-      aprovador = obter_usuario(aprovador_cpf)
+      aprovador = obter_identidade(aprovador_cpf)
       if not aprovador:
           return jsonify({"erro": "Aprovador não encontrado"}), 404
       
@@ -282,8 +317,7 @@ def rejeitar(evento_id: int):
           return jsonify({"erro": "Evento não encontrado"}), 404
       
       # Verifica permissão para rejeitar
-      if (aprovador.tipo_usuario not in [TipoUsuario.RH.value] and 
-          aprovador.flag_gestor != FlagGestor.SIM.value):
+      if not aprovador.e_rh and not aprovador.e_gestor:
           return jsonify({"erro": "Sem permissão para rejeitar eventos"}), 403
       
       # Verifica se o aprovador pode rejeitar eventos deste usuário
@@ -299,3 +333,51 @@ def rejeitar(evento_id: int):
       return jsonify({"erro": f"Parâmetro ausente: {ke}"}), 400
   except Exception as e:
       return jsonify({"erro": str(e)}), 500
+
+def _decidir_lote(status_novo: StatusEvento):
+  """Aprova ou rejeita em lote os eventos de `ids`, com o usuário autenticado como aprovador"""
+  dados: Dict[str, Any] = request.get_json(force=True)
+  
+  try:
+      ids = dados["ids"]
+      if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+          return jsonify({"erro": "ids deve ser uma lista não vazia de ids de evento"}), 400
+      if len(ids) > LIMITE_LOTE_DECISAO:
+          return jsonify({"erro": f"No máximo {LIMITE_LOTE_DECISAO} eventos por lote"}), 400
+      
+      usuario_cpf = extrair_usuario_cpf_do_token()
+      if not usuario_cpf:
+          return jsonify({"erro": "Token de autenticação necessário"}), 401
+      
+      # A permissão é verificada uma vez e vira o escopo do lote: empresa do RH ou grupo do gestor
+      aprovador = obter_identidade(usuario_cpf)
+      if aprovador and aprovador.e_rh and aprovador.cnpj_empresa:
+          escopo = {"cnpj_empresa": aprovador.cnpj_empresa}
+      elif aprovador and aprovador.e_gestor and aprovador.grupo_id:
+          escopo = {"grupo_id": aprovador.grupo_id}
+      else:
+          return jsonify({"erro": "Sem permissão para decidir eventos"}), 403
+      
+      resultados = decidir_eventos_lote(ids, usuario_cpf, status_novo, **escopo)
+      return jsonify({
+          "total_alterados": sum(1 for r in resultados.values() if r == status_novo.value),
+          "resultados": [{"id": evento_id, "resultado": r} for evento_id, r in resultados.items()]
+      }), 200
+  except KeyError as ke:
+      return jsonify({"erro": f"Parâmetro ausente: {ke}"}), 400
+  except ValueError as ve:
+      return jsonify({"erro": f"Valor inválido: {ve}"}), 400
+  except Exception as e:
+      return jsonify({"erro": str(e)}), 500
+
+@eventos_bp.route('/aprovar-lote', methods=['POST'])
+@jwt_required
+def aprovar_lote():
+  """Aprova vários eventos pendentes em uma transação"""
+  return _decidir_lote(StatusEvento.APROVADO)
+
+@eventos_bp.route('/rejeitar-lote', methods=['POST'])
+@jwt_required
+def rejeitar_lote():
+  """Rejeita vários eventos pendentes em uma transação"""
+  return _decidir_lote(StatusEvento.REJEITADO)
@@ -0,0 +1,46 @@
+"""
+Respostas em streaming para exportação de listagens grandes
+"""
+from typing import Any, Dict, Iterable, Iterator, Optional
+from flask import Response, current_app, request, stream_with_context
+
+FORMATO_NDJSON = 'ndjson'
+FORMATO_JSON_STREAM = 'json-stream'
+MIMETYPE_NDJSON = 'application/x-ndjson'
+
+def obter_formato_streaming() -> Optional[str]:
+    """
+    Retorna o formato de streaming pedido (`?formato=ndjson|json-stream` ou
+    `Accept: application/x-ndjson`), ou None para a resposta JSON usual.
+    """
+    formato = request.args.get('formato')
+    if formato:
+        if formato not in (FORMATO_NDJSON, FORMATO_JSON_STREAM):
+            raise ValueError(f"formato deve ser '{FORMATO_NDJSON}' ou '{FORMATO_JSON_STREAM}'")
+        return formato
+    if request.accept_mimetypes.best == MIMETYPE_NDJSON:
+        return FORMATO_NDJSON
+    return None
+
+def _linhas_ndjson(itens: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    dumps = current_app.json.dumps
+    for item in itens:
+        yield dumps(item) + '\n'
+
+def _array_json(itens: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    dumps = current_app.json.dumps
+    separador = '['
+    for item in itens:
+        yield separador + dumps(item)
+        separador = ','
+    yield '[]' if separador == '[' else ']'
+
+def resposta_streaming(itens: Iterable[Dict[str, Any]], formato: str) -> Response:
+    """
+    Envia os itens à medida que o gerador os produz: uma linha JSON por item
+    (NDJSON) ou um único array JSON em partes. Erros depois do primeiro byte não
+    têm como virar status HTTP e apenas interrompem a resposta.
+    """
+    if formato == FORMATO_NDJSON:
+        return Response(stream_with_context(_linhas_ndjson(itens)), mimetype=MIMETYPE_NDJSON)
+    return Response(stream_with_context(_array_json(itens)), mimetype='application/json')
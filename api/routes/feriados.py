@@ -1,9 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from typing import Dict, Any
 
 from ..database.crud import (
     criar_feriado_nacional, criar_feriado_estadual,
-    listar_feriados_nacionais, listar_feriados_estaduais
+    feriado_para_dict, feriados_json
 )
 from ..middleware.auth import jwt_required, rh_required
 
@@ -12,15 +12,9 @@ feriados_bp = Blueprint('feriados', __name__)
 @feriados_bp.route('/nacionais', methods=['GET'])
 @jwt_required
 def listar_nacionais():
-    """Lista feriados nacionais"""
+    """Lista feriados nacionais (valem para todas as UFs, `?uf=` não filtra)"""
     try:
-        uf = request.args.get('uf')
-        feriados = listar_feriados_nacionais(uf)
-        return jsonify([{
-            "data_feriado": f.data_feriado.isoformat(),
-            "uf": f.uf,
-            "descricao_feriado": f.descricao_feriado
-        } for f in feriados]), 200
+        return Response(feriados_json(tipo="nacional"), status=200, mimetype='application/json')
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -30,12 +24,7 @@ def listar_estaduais():
     """Lista feriados estaduais"""
     try:
         uf = request.args.get('uf')
-        feriados = listar_feriados_estaduais(uf)
-        return jsonify([{
-            "data_feriado": f.data_feriado.isoformat(),
-            "uf": f.uf,
-            "descricao_feriado": f.descricao_feriado
-        } for f in feriados]), 200
+        return Response(feriados_json(tipo="estadual", uf=uf), status=200, mimetype='application/json')
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -46,30 +35,7 @@ def listar_todos():
         uf = request.args.get('uf')
         
         # Combina feriados nacionais e estaduais
-        feriados_nacionais = listar_feriados_nacionais(uf)
-        feriados_estaduais = listar_feriados_estaduais(uf)
-        
-        todos_feriados = []
-        
-        # Adiciona feriados nacionais
-        for f in feriados_nacionais:
-            todos_feriados.append({
-                "data_feriado": f.data_feriado.isoformat(),
-                "uf": f.uf,
-                "descricao_feriado": f.descricao_feriado,
-                "tipo": "nacional"
-            })
-        
-        # Adiciona feriados estaduais
-        for f in feriados_estaduais:
-            todos_feriados.append({
-                "data_feriado": f.data_feriado.isoformat(),
-                "uf": f.uf,
-                "descricao_feriado": f.descricao_feriado,
-                "tipo": "estadual"
-            })
-        
-        return jsonify(todos_feriados), 200
+        return Response(feriados_json(uf=uf), status=200, mimetype='application/json')
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -87,11 +53,7 @@ def criar_nacional():
             descricao_feriado=dados["descricao_feriado"]
         )
         
-        return jsonify({
-            "data_feriado": feriado.data_feriado.isoformat(),
-            "uf": feriado.uf,
-            "descricao_feriado": feriado.descricao_feriado
-        }), 201
+        return jsonify(feriado_para_dict(feriado)), 201
     except KeyError as ke:
         return jsonify({"erro": f"Parâmetro ausente: {ke}"}), 400
     except Exception as e:
@@ -111,11 +73,7 @@ def criar_estadual():
             descricao_feriado=dados["descricao_feriado"]
         )
         
-        return jsonify({
-            "data_feriado": feriado.data_feriado.isoformat(),
-            "uf": feriado.uf,
-            "descricao_feriado": feriado.descricao_feriado
-        }), 201
+        return jsonify(feriado_para_dict(feriado)), 201
     except KeyError as ke:
         return jsonify({"erro": f"Parâmetro ausente: {ke}"}), 400
     except Exception as e:
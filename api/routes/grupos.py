@@ -3,13 +3,15 @@ from typing import Dict, Any
 
 from ..database.crud import (
     criar_grupo, listar_grupos, obter_grupo, 
-    atualizar_grupo, deletar_grupo, grupo_para_dict
+    atualizar_grupo, deletar_grupo, grupo_para_dict, separar_pagina
 )
 from ..middleware.auth import (
     jwt_required, requer_permissao_grupo, filtrar_por_escopo_usuario,
-    extrair_usuario_cpf_do_token
+    extrair_usuario_cpf_do_token, get_usuario_autenticado
 )
 
+from .paginacao import obter_parametros_paginacao, cabecalhos_paginacao
+
 grupos_bp = Blueprint('grupos', __name__)
 
 @grupos_bp.route('', methods=['GET'])
@@ -22,13 +24,17 @@ def listar():
             return jsonify({"erro": "Token de autenticação necessário"}), 401
         
         ativos_apenas = request.args.get('ativos', 'true').lower() == 'true'
+        limit, cursor = obter_parametros_paginacao()
+        proximo_cursor = None
         
         # Aplica filtros baseados no escopo do usuário
         filtros = filtrar_por_escopo_usuario(usuario_cpf)
         
         if filtros and 'cnpj_empresa' in filtros:
             # RH vê grupos da sua empresa
-            grupos = listar_grupos(cnpj_empresa=filtros['cnpj_empresa'], ativos_apenas=ativos_apenas)
+            grupos = listar_grupos(cnpj_empresa=filtros['cnpj_empresa'], ativos_apenas=ativos_apenas,
+                                   limit=limit, cursor=cursor)
+            grupos, proximo_cursor = separar_pagina(grupos, limit, lambda g: (g.nome, g.id))
         elif filtros and 'grupo_id' in filtros:
             # Gestores e usuários comuns veem apenas seu grupo
             grupo_id = filtros['grupo_id']
@@ -40,7 +46,9 @@ def listar():
         else:
             grupos = []
         
-        return jsonify([grupo_para_dict(g) for g in grupos]), 200
+        return jsonify([grupo_para_dict(g) for g in grupos]), 200, cabecalhos_paginacao(proximo_cursor)
+    except ValueError as ve:
+        return jsonify({"erro": f"Valor inválido: {ve}"}), 400
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -75,8 +83,7 @@ def criar():
             return jsonify({"erro": "Token de autenticação necessário"}), 401
         
         # Apenas RH pode criar grupos
-        from ..database.crud import obter_usuario
-        usuario = obter_usuario(usuario_cpf)
+        usuario = get_usuario_autenticado()
         if not usuario or usuario.tipo_usuario != 'rh':
             return jsonify({"erro": "Apenas RH pode criar grupos"}), 403
         
@@ -95,9 +102,7 @@ def criar():
 
         # RH pode criar grupos apenas na sua própria empresa
         if usuario.grupo_id:
-            from ..database.crud import obter_grupo
-            grupo_rh = obter_grupo(usuario.grupo_id)
-            if not grupo_rh or grupo_rh.cnpj_empresa != cnpj_empresa:
+            if not usuario.cnpj_empresa or usuario.cnpj_empresa != cnpj_empresa:
                 return jsonify({"erro": "RH só pode criar grupos na sua própria empresa"}), 403
         
         grupo = criar_grupo(
@@ -124,8 +129,7 @@ def atualizar(grupo_id: int):
         if not usuario_cpf:
             return jsonify({"erro": "Token de autenticação necessário"}), 401
             
-        from ..database.crud import obter_usuario
-        usuario = obter_usuario(usuario_cpf)
+        usuario = get_usuario_autenticado()
         if not usuario or usuario.tipo_usuario != 'rh':
             return jsonify({"erro": "Apenas RH pode atualizar grupos"}), 403
         
@@ -146,8 +150,7 @@ def deletar(grupo_id: int):
         if not usuario_cpf:
             return jsonify({"erro": "Token de autenticação necessário"}), 401
             
-        from ..database.crud import obter_usuario
-        usuario = obter_usuario(usuario_cpf)
+        usuario = get_usuario_autenticado()
         if not usuario or usuario.tipo_usuario != 'rh':
             return jsonify({"erro": "Apenas RH pode desativar grupos"}), 403
         
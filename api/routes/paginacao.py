@@ -0,0 +1,27 @@
+"""
+Parâmetros e cabeçalhos da paginação por cursor (keyset) das listagens
+"""
+from typing import Dict, Optional, Tuple
+from flask import request
+
+LIMITE_PADRAO_PAGINA = 100
+LIMITE_MAXIMO_PAGINA = 500
+CABECALHO_PROXIMO_CURSOR = 'X-Next-Cursor'
+
+def obter_parametros_paginacao() -> Tuple[Optional[int], Optional[str]]:
+    """
+    Lê `?limit=` e `?cursor=` da requisição. Sem nenhum dos dois a listagem
+    não é paginada; com apenas o cursor usa LIMITE_PADRAO_PAGINA.
+    """
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor') or None
+
+    if limit is None:
+        return (LIMITE_PADRAO_PAGINA, cursor) if cursor else (None, None)
+    if limit < 1:
+        raise ValueError("limit deve ser maior que zero")
+    return min(limit, LIMITE_MAXIMO_PAGINA), cursor
+
+def cabecalhos_paginacao(proximo_cursor: Optional[str]) -> Dict[str, str]:
+    """Cabeçalho com o cursor da próxima página (vazio na última página)"""
+    return {CABECALHO_PROXIMO_CURSOR: proximo_cursor} if proximo_cursor else {}
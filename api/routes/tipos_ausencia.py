@@ -1,5 +1,7 @@
-from flask import Blueprint, jsonify, request
-from ..database.crud import listar_tipos_ausencia, obter_tipo_ausencia, criar_tipo_ausencia
+from flask import Blueprint, Response, jsonify, request
+from ..database.crud import (
+    criar_tipo_ausencia, tipo_ausencia_para_dict, referencia_json, referencia_item_json
+)
 from ..middleware.auth import jwt_required, rh_required
 
 tipos_ausencia_bp = Blueprint('tipos_ausencia', __name__)
@@ -8,12 +10,7 @@ tipos_ausencia_bp = Blueprint('tipos_ausencia', __name__)
 def listar():
     """Lista todos os tipos de ausência"""
     try:
-        tipos = listar_tipos_ausencia()
-        return jsonify([{
-            "id": tipo.id_tipo_ausencia,
-            "descricao": tipo.descricao_ausencia,
-            "usa_turno": tipo.usa_turno
-        } for tipo in tipos]), 200
+        return Response(referencia_json("tipos_ausencia"), status=200, mimetype='application/json')
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -21,15 +18,11 @@ def listar():
 def obter(id_tipo):
     """Obtém um tipo de ausência específico pelo ID"""
     try:
-        tipo = obter_tipo_ausencia(id_tipo)
+        tipo = referencia_item_json("tipos_ausencia", id_tipo)
         if not tipo:
             return jsonify({"erro": "Tipo de ausência não encontrado"}), 404
         
-        return jsonify({
-            "id": tipo.id_tipo_ausencia,
-            "descricao": tipo.descricao_ausencia,
-            "usa_turno": tipo.usa_turno
-        }), 200
+        return Response(tipo, status=200, mimetype='application/json')
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -51,10 +44,6 @@ def criar():
             usa_turno=usa_turno
         )
         
-        return jsonify({
-            "id": tipo.id_tipo_ausencia,
-            "descricao": tipo.descricao_ausencia,
-            "usa_turno": tipo.usa_turno
-        }), 201
+        return jsonify(tipo_ausencia_para_dict(tipo)), 201
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
@@ -1,5 +1,5 @@
-from flask import Blueprint, jsonify, request
-from ..database.crud import listar_turnos, obter_turno, criar_turno
+from flask import Blueprint, Response, jsonify, request
+from ..database.crud import criar_turno, turno_para_dict, referencia_json, referencia_item_json
 from ..middleware.auth import jwt_required, rh_required
 
 turnos_bp = Blueprint('turnos', __name__)
@@ -8,11 +8,7 @@ turnos_bp = Blueprint('turnos', __name__)
 def listar():
     """Lista todos os turnos"""
     try:
-        turnos = listar_turnos()
-        return jsonify([{
-            "id": turno.id,
-            "descricao": turno.descricao_ausencia
-        } for turno in turnos]), 200
+        return Response(referencia_json("turnos"), status=200, mimetype='application/json')
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -20,14 +16,11 @@ def listar():
 def obter(turno_id):
     """Obtém um turno específico pelo ID"""
     try:
-        turno = obter_turno(turno_id)
+        turno = referencia_item_json("turnos", turno_id)
         if not turno:
             return jsonify({"erro": "Turno não encontrado"}), 404
         
-        return jsonify({
-            "id": turno.id,
-            "descricao": turno.descricao_ausencia
-        }), 200
+        return Response(turno, status=200, mimetype='application/json')
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -43,12 +36,9 @@ def criar():
             return jsonify({"erro": "Descrição do turno é obrigatória"}), 400
         
         turno = criar_turno(
-            descricao_ausencia=dados['descricao_ausencia']
+            descricao_turno=dados['descricao_ausencia']
         )
         
-        return jsonify({
-            "id": turno.id,
-            "descricao": turno.descricao_ausencia
-        }), 201
+        return jsonify(turno_para_dict(turno)), 201
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
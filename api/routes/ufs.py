@@ -1,5 +1,5 @@
-from flask import Blueprint, jsonify
-from ..database.crud import listar_ufs, obter_uf
+from flask import Blueprint, Response, jsonify
+from ..database.crud import referencia_json, referencia_item_json
 
 ufs_bp = Blueprint('ufs', __name__)
 
@@ -7,8 +7,7 @@ ufs_bp = Blueprint('ufs', __name__)
 def listar():
     """Lista todas as UFs cadastradas"""
     try:
-        ufs = listar_ufs()
-        return jsonify([{"uf": uf.uf, "cod_uf": uf.cod_uf} for uf in ufs]), 200
+        return Response(referencia_json("ufs"), status=200, mimetype='application/json')
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -16,10 +15,10 @@ def listar():
 def obter(uf):
     """Obtém uma UF específica pelo código"""
     try:
-        estado = obter_uf(uf)
+        estado = referencia_item_json("ufs", uf)
         if not estado:
             return jsonify({"erro": "UF não encontrada"}), 404
         
-        return jsonify({"uf": estado.uf, "cod_uf": estado.cod_uf}), 200
+        return Response(estado, status=200, mimetype='application/json')
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
@@ -1,17 +1,27 @@
 from flask import Blueprint, request, jsonify
 from typing import Dict, Any
+from datetime import datetime
+import io
 from sqlalchemy.exc import IntegrityError
 
 from ..database.crud import (
 criar_usuario, listar_usuarios, obter_usuario,
-atualizar_usuario, deletar_usuario, usuario_para_dict
+atualizar_usuario, deletar_usuario, usuario_para_dict, separar_pagina,
+iterar_usuarios, saldos_ferias, iterar_relatorio_ferias, escopos_listagem,
+importar_usuarios
 )
+from ..database.importacao import LEITORES, FORMATO_CSV, FORMATO_NDJSON
 from ..database.models import TipoUsuario, FlagGestor
 from ..middleware.auth import (
 jwt_required, requer_permissao_usuario, filtrar_por_escopo_usuario,
-extrair_usuario_cpf_do_token, verificar_permissao_grupo
+extrair_usuario_cpf_do_token, verificar_permissao_grupo,
+get_usuario_autenticado, obter_identidade
 )
 
+from .paginacao import obter_parametros_paginacao, cabecalhos_paginacao
+from .exportacao import obter_formato_streaming, resposta_streaming, FORMATO_JSON_STREAM
+from .condicional import verificar_etag, cabecalhos_etag
+
 usuarios_bp = Blueprint('usuarios', __name__)
 
 @usuarios_bp.route('', methods=['GET'])
@@ -26,38 +36,55 @@ def listar():
         grupo_id = request.args.get('grupo_id', type=int)
         tipo_usuario = request.args.get('tipo_usuario')
         ativos_apenas = request.args.get('ativos', 'true').lower() == 'true'
+        limit, cursor = obter_parametros_paginacao()
+        formato_streaming = obter_formato_streaming()
         
         # Aplica filtros baseados no escopo do usuário
         filtros = filtrar_por_escopo_usuario(usuario_cpf)
         
         # Determina o grupo_id baseado no escopo
+        cnpj_empresa = None
         if filtros and 'grupo_id' in filtros:
             # Gestores e usuários comuns veem apenas seu grupo
             grupo_id_final = filtros['grupo_id']
         elif filtros and 'cnpj_empresa' in filtros:
             # RH pode especificar grupo ou ver todos da empresa
             grupo_id_final = grupo_id  # Pode ser None para ver todos da empresa
+            cnpj_empresa = filtros['cnpj_empresa']
         else:
             return jsonify([]), 200
         
+        etag, nao_modificado = verificar_etag(
+            escopos_listagem(grupo_id=grupo_id_final, cnpj_empresa=cnpj_empresa, eventos=False), usuario_cpf)
+        if nao_modificado:
+            return nao_modificado
+        
+        if formato_streaming:
+            # Exportação completa do escopo, sem paginação
+            resposta = resposta_streaming(iterar_usuarios(
+                grupo_id=grupo_id_final,
+                tipo_usuario=tipo_usuario,
+                ativos_apenas=ativos_apenas,
+                cnpj_empresa=cnpj_empresa
+            ), formato_streaming)
+            resposta.headers.update(cabecalhos_etag(etag))
+            return resposta
+        
         usuarios = listar_usuarios(
             grupo_id=grupo_id_final, 
             tipo_usuario=tipo_usuario, 
-            ativos_apenas=ativos_apenas
+            ativos_apenas=ativos_apenas,
+            cnpj_empresa=cnpj_empresa,
+            limit=limit,
+            cursor=cursor
         )
+        usuarios, proximo_cursor = separar_pagina(usuarios, limit, lambda u: (u.nome, u.cpf))
         
-        # Para RH, filtra por empresa se não especificou grupo
-        if filtros and 'cnpj_empresa' in filtros and not grupo_id:
-            from ..database.crud import obter_grupo
-            usuarios_filtrados = []
-            for usuario in usuarios:
-                if usuario.grupo_id:
-                    grupo = obter_grupo(usuario.grupo_id)
-                    if grupo and grupo.cnpj_empresa == filtros['cnpj_empresa']:
-                        usuarios_filtrados.append(usuario)
-            usuarios = usuarios_filtrados
-        
-        return jsonify([usuario_para_dict(u) for u in usuarios]), 200
+        return jsonify([usuario_para_dict(u) for u in usuarios]), 200, {
+            **cabecalhos_paginacao(proximo_cursor), **cabecalhos_etag(etag)
+        }
+    except ValueError as ve:
+        return jsonify({"erro": f"Valor inválido: {ve}"}), 400
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
@@ -74,6 +101,63 @@ def obter(cpf: int):
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
 
+@usuarios_bp.route('/saldo-ferias', methods=['GET'])
+@jwt_required
+def relatorio_saldo_ferias():
+    """Elegibilidade e saldo de férias de todos os usuários da empresa (RH) ou do grupo (gestor)"""
+    try:
+        usuario = get_usuario_autenticado()
+        grupo_id = request.args.get('grupo_id', type=int)
+        ativos_apenas = request.args.get('ativos', 'true').lower() == 'true'
+        data_ref = request.args.get('data_referencia')
+        data_ref = datetime.strptime(data_ref, "%Y-%m-%d").date() if data_ref else None
+        formato = obter_formato_streaming() or FORMATO_JSON_STREAM
+        
+        cnpj_empresa = None
+        if usuario.e_rh:
+            # RH vê a empresa inteira ou um grupo dela
+            if not usuario.cnpj_empresa:
+                return jsonify([]), 200
+            if grupo_id and not verificar_permissao_grupo(usuario.cpf, grupo_id):
+                return jsonify({"erro": "Sem permissão para acessar este grupo"}), 403
+            cnpj_empresa = usuario.cnpj_empresa
+        elif usuario.e_gestor:
+            # Gestor vê apenas o próprio grupo
+            if grupo_id and grupo_id != usuario.grupo_id:
+                return jsonify({"erro": "Sem permissão para acessar este grupo"}), 403
+            grupo_id = usuario.grupo_id
+        else:
+            return jsonify({"erro": "Apenas RH e gestores podem consultar o relatório de férias"}), 403
+        
+        return resposta_streaming(iterar_relatorio_ferias(
+            cnpj_empresa=cnpj_empresa,
+            grupo_id=grupo_id,
+            reference_date=data_ref,
+            ativos_apenas=ativos_apenas
+        ), formato)
+    except ValueError as ve:
+        return jsonify({"erro": f"Valor inválido: {ve}"}), 400
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
+@usuarios_bp.route('/<int:cpf>/saldo-ferias', methods=['GET'])
+@jwt_required
+@requer_permissao_usuario
+def saldo_ferias(cpf: int):
+    """Dias de férias usados nos últimos 12 meses e saldo restante"""
+    try:
+        if not obter_identidade(cpf):
+            return jsonify({"erro": "Usuário não encontrado"}), 404
+        data_ref = request.args.get('data_referencia')
+        data_ref = datetime.strptime(data_ref, "%Y-%m-%d").date() if data_ref else None
+        
+        saldo = saldos_ferias([cpf], data_ref)[cpf]
+        return jsonify({"cpf": cpf, **saldo}), 200
+    except ValueError as ve:
+        return jsonify({"erro": f"Valor inválido: {ve}"}), 400
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
 @usuarios_bp.route('', methods=['POST'])
 @jwt_required
 def criar():
@@ -86,8 +170,7 @@ def criar():
           return jsonify({"erro": "Token de autenticação necessário"}), 401
       
       # Verifica permissões baseadas no tipo de usuário
-      from ..database.crud import obter_usuario as get_user
-      usuario_logado = get_user(usuario_cpf)
+      usuario_logado = get_usuario_autenticado()
       if not usuario_logado:
           return jsonify({"erro": "Usuário não encontrado"}), 404
       
@@ -135,6 +218,43 @@ def criar():
   except Exception as e:
       return jsonify({"erro": str(e)}), 500
 
+@usuarios_bp.route('/importar', methods=['POST'])
+@jwt_required
+def importar():
+    """Importa usuários em lote a partir de CSV, NDJSON ou de um array JSON"""
+    try:
+        usuario = get_usuario_autenticado()
+        if usuario.e_rh and usuario.cnpj_empresa:
+            # RH importa para qualquer grupo da empresa
+            escopo = {"cnpj_empresa": usuario.cnpj_empresa}
+        elif usuario.e_gestor and usuario.grupo_id:
+            # Gestor importa apenas para o próprio grupo
+            escopo = {"grupo_id": usuario.grupo_id}
+        else:
+            return jsonify({"erro": "Sem permissão para criar usuários"}), 403
+        
+        formato = request.args.get('formato')
+        if not formato:
+            if request.mimetype == 'text/csv':
+                formato = FORMATO_CSV
+            elif request.mimetype == 'application/x-ndjson':
+                formato = FORMATO_NDJSON
+        if formato:
+            if formato not in LEITORES:
+                return jsonify({"erro": f"formato deve ser um de: {', '.join(LEITORES)}"}), 400
+            linhas = LEITORES[formato](io.StringIO(request.get_data(as_text=True)))
+        else:
+            linhas = request.get_json(force=True)
+            if not isinstance(linhas, list):
+                return jsonify({"erro": "Esperado um array JSON de usuários"}), 400
+        
+        resultado = importar_usuarios(linhas, **escopo)
+        return jsonify(resultado), 200
+    except ValueError as ve:
+        return jsonify({"erro": f"Valor inválido: {ve}"}), 400
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
+
 @usuarios_bp.route('/<int:cpf>', methods=['PUT'])
 @jwt_required
 @requer_permissao_usuario
@@ -146,8 +266,7 @@ def atualizar(cpf: int):
         usuario_cpf = extrair_usuario_cpf_do_token()
         if usuario_cpf is None:
             return jsonify({"erro": "Token de autenticação necessário"}), 401
-        from ..database.crud import obter_usuario as get_user
-        usuario_logado = get_user(usuario_cpf)
+        usuario_logado = get_usuario_autenticado()
         
         if not usuario_logado:
             return jsonify({"erro": "Usuário logado não encontrado"}), 404
@@ -183,8 +302,7 @@ def deletar(cpf: int):
         usuario_cpf = extrair_usuario_cpf_do_token()
         if usuario_cpf is None:
             return jsonify({"erro": "Token de autenticação necessário"}), 401
-        from ..database.crud import obter_usuario as get_user
-        usuario_logado = get_user(usuario_cpf)
+        usuario_logado = get_usuario_autenticado()
         
         if not usuario_logado:
             return jsonify({"erro": "Usuário logado não encontrado"}), 404
@@ -198,17 +316,15 @@ def deletar(cpf: int):
             return jsonify({"erro": "Não é possível desativar sua própria conta"}), 400
         
         # Verifica se tem permissão para desativar este usuário específico
-        usuario_alvo = get_user(cpf)
+        usuario_alvo = obter_identidade(cpf)
         if not usuario_alvo:
             return jsonify({"erro": "Usuário não encontrado"}), 404
             
         # RH só pode desativar usuários da mesma empresa
         if usuario_logado.tipo_usuario == TipoUsuario.RH.value:
-            from ..database.crud import obter_grupo
             if usuario_logado.grupo_id and usuario_alvo.grupo_id:
-                grupo_rh = obter_grupo(usuario_logado.grupo_id)
-                grupo_alvo = obter_grupo(usuario_alvo.grupo_id)
-                if not (grupo_rh and grupo_alvo and grupo_rh.cnpj_empresa == grupo_alvo.cnpj_empresa):
+                if not (usuario_logado.cnpj_empresa and usuario_alvo.cnpj_empresa and
+                        usuario_logado.cnpj_empresa == usuario_alvo.cnpj_empresa):
                     return jsonify({"erro": "Sem permissão para desativar usuários de outra empresa"}), 403
         
         # Gestor só pode desativar usuários do mesmo grupo
@@ -3,6 +3,8 @@ Endpoints para validação de integridade
 """
 from flask import Blueprint, jsonify
 from ..middleware.auth import jwt_required, rh_required
+from ..database.crud import estatisticas_cache_identidades, estatisticas_cache_referencias
+from ..database.cache import tokens_cache
 from ..validation.integrity_checker import CPFCNPJIntegrityChecker
 from ..validation.report_generator import ReportGenerator
 
@@ -44,3 +46,17 @@ def get_integrity_report():
         }), 200
     except Exception as e:
         return jsonify({"erro": str(e)}), 500
+
+@validation_bp.route('/cache-stats', methods=['GET'])
+@jwt_required
+@rh_required
+def get_cache_stats():
+    """Endpoint com os contadores dos caches em memória deste processo (apenas RH)"""
+    try:
+        return jsonify({
+            "identidades": estatisticas_cache_identidades(),
+            "referencias": estatisticas_cache_referencias(),
+            "tokens": tokens_cache.stats()
+        }), 200
+    except Exception as e:
+        return jsonify({"erro": str(e)}), 500
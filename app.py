@@ -14,6 +14,8 @@ from api.routes.ufs import ufs_bp
 from api.routes.feriados import feriados_bp
 from api.routes.validation import validation_bp
 from api.database.models import init_db
+from api.database.crud import reconstruir_lancamentos_ferias, ajustar_alcance_eventos, MAX_DURACAO_EVENTO
+from api.database.senhas import pool_senhas
 from api.routes.calendario import calendario_bp
 
 # Carrega variáveis de ambiente
@@ -24,9 +26,12 @@ def create_app():
     
     # Configurações
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
+    # Autorização pelas claims do JWT, revalidando o usuário no banco a cada N segundos
+    app.config['JWT_CLAIMS_AUTH'] = os.getenv('JWT_CLAIMS_AUTH', 'false').lower() == 'true'
+    app.config['JWT_CLAIMS_REVALIDATE_SECONDS'] = int(os.getenv('JWT_CLAIMS_REVALIDATE_SECONDS', '300'))
     
-    # CORS
-    CORS(app)
+    # CORS (expõe o cursor da próxima página das listagens paginadas)
+    CORS(app, expose_headers=['X-Next-Cursor', 'ETag'])
     
     # Configuração do banco de dados com fallback
     database_url = None
@@ -48,6 +53,17 @@ def create_app():
     
     # Inicializa banco de dados (com fallback automático)
     init_db(database_url)
+    # Alinha a razão de férias com os eventos (tabela nova ou dados gravados pelos seeds)
+    reconstruir_lancamentos_ferias()
+    # Eventos antigos mais longos que o limite ampliam a faixa das buscas por data
+    alcance = ajustar_alcance_eventos()
+    if alcance > MAX_DURACAO_EVENTO:
+        print(f"⚠️  Há eventos de até {alcance} dias (limite: {MAX_DURACAO_EVENTO}); "
+              f"buscas por período consideram {alcance} dias para trás")
+    # Custo do hash de senha nesta máquina (ajuste PASSWORD_HASH_METHOD/WORKERS a partir dele)
+    calibracao = pool_senhas.calibrar()
+    print(f"🔐 Hash de senha {calibracao['metodo']}: {calibracao['custo_ms']} ms por hash, "
+          f"{calibracao['processos']} processos (~{calibracao['hashes_por_segundo']} hashes/s)")
     
     # Health check endpoint
     @app.route('/')
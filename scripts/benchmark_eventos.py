@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark da serialização de eventos
+Compara o número de consultas e o tempo da conversão por evento
+(evento_para_dict), da conversão em lote (eventos_para_dicts) e da
+listagem projetada (listar_eventos_projetados)
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.database import models
+from api.database.models import (
+    init_db, get_session, UF, Empresa, Grupo, Usuario, TipoAusencia, Evento
+)
+from api.database.crud import (
+    evento_para_dict, eventos_para_dicts, listar_eventos, listar_eventos_projetados
+)
+
+TOTAL_USUARIOS = 50
+
+class ContadorConsultas:
+    """Conta as consultas executadas na engine global"""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, *args, **kwargs):
+        self.total += 1
+
+    def __enter__(self):
+        self.total = 0
+        event.listen(models.engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(models.engine, "before_cursor_execute", self)
+
+def popular_banco(total_eventos: int):
+    """Cria uma empresa, um grupo, usuários e eventos sintéticos"""
+    with get_session() as session:
+        session.add(UF(cod_uf=35, uf="SP"))
+        session.add(Empresa(cnpj=11222333000181, id=1, nome="Benchmark", endereco="Rua A",
+                            telefone="11999999999", email="bench@empresa.com",
+                            criado_em=date.today()))
+        session.add(Grupo(id=1, nome="Grupo", cnpj_empresa=11222333000181,
+                          telefone="11999999999", criado_em=date.today()))
+        session.add_all([
+            TipoAusencia(id_tipo_ausencia=1, descricao_ausencia="Férias"),
+            TipoAusencia(id_tipo_ausencia=2, descricao_ausencia="Licença Médica"),
+        ])
+        for i in range(TOTAL_USUARIOS):
+            session.add(Usuario(cpf=10000000000 + i, nome=f"Usuário {i}",
+                                email=f"usuario{i}@empresa.com", senha_hash=f"hash-{i}",
+                                grupo_id=1, inicio_na_empresa=date(2020, 1, 1), UF="SP",
+                                criado_em=datetime.now()))
+        inicio = date(2020, 1, 1)
+        for i in range(total_eventos):
+            data_inicio = inicio + timedelta(days=i % 1500)
+            session.add(Evento(cpf_usuario=10000000000 + i % TOTAL_USUARIOS,
+                               data_inicio=data_inicio, data_fim=data_inicio + timedelta(days=4),
+                               total_dias=5, id_tipo_ausencia=1 + i % 2, UF="SP",
+                               aprovado_por=10000000000, status="aprovado",
+                               criado_em=datetime.now()))
+        session.commit()
+
+def medir(funcao):
+    with ContadorConsultas() as contador:
+        inicio = time.perf_counter()
+        funcao()
+        duracao = time.perf_counter() - inicio
+    return contador.total, duracao
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da serialização de eventos')
+    parser.add_argument('--eventos', '-n', type=int, nargs='+', default=[100, 500, 2000],
+                        help='Quantidades de eventos a testar')
+    args = parser.parse_args()
+
+    print(f"{'eventos':>8} | {'consultas (item)':>16} | {'tempo':>8} | {'consultas (lote)':>16} | {'tempo':>8}"
+          f" | {'consultas (projeção)':>20} | {'tempo':>8}")
+    for total in args.eventos:
+        with tempfile.TemporaryDirectory() as diretorio:
+            init_db(f"sqlite:///{os.path.join(diretorio, 'benchmark.db')}")
+            popular_banco(total)
+            eventos = listar_eventos()
+
+            consultas_item, tempo_item = medir(lambda: [evento_para_dict(e) for e in eventos])
+            consultas_lote, tempo_lote = medir(lambda: eventos_para_dicts(listar_eventos()))
+            consultas_proj, tempo_proj = medir(listar_eventos_projetados)
+            models.engine.dispose()
+
+        print(f"{total:>8} | {consultas_item:>16} | {tempo_item:>7.3f}s | {consultas_lote:>16} | {tempo_lote:>7.3f}s"
+              f" | {consultas_proj:>20} | {tempo_proj:>7.3f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark do perfil de ajuste do SQLite
+Compara a vazão de leituras e escritas concorrentes com os padrões do SQLite
+(SQLITE_TUNING=false) e com o perfil aplicado pelo init_db (WAL,
+synchronous=NORMAL, mmap, cache, busy_timeout)
+"""
+
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+import threading
+from datetime import date, datetime, timedelta
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.database import models
+from api.database.models import init_db, get_session, Evento
+from api.database.crud import obter_evento, listar_eventos
+from api.database.perfil_sqlite import pragmas_efetivos
+from scripts.benchmark_eventos import popular_banco, TOTAL_USUARIOS
+
+PERFIS = (("padrão", "false"), ("ajustado", "true"))
+
+class Contadores:
+    def __init__(self):
+        self.leituras = 0
+        self.escritas = 0
+        self.erros = 0
+        self._lock = threading.Lock()
+
+    def somar(self, campo: str) -> None:
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+def leitor(fim: float, total_eventos: int, contadores: Contadores):
+    """Alterna a leitura de um evento e a listagem dos eventos de um usuário"""
+    aleatorio = random.Random()
+    while time.perf_counter() < fim:
+        try:
+            if aleatorio.random() < 0.5:
+                obter_evento(aleatorio.randint(1, total_eventos))
+            else:
+                listar_eventos(cpf_usuario=10000000000 + aleatorio.randrange(TOTAL_USUARIOS))
+            contadores.somar("leituras")
+        except Exception:
+            contadores.somar("erros")
+
+def escritor(fim: float, contadores: Contadores):
+    """Grava um evento pendente por transação"""
+    inicio = date(2030, 1, 1)
+    i = 0
+    while time.perf_counter() < fim:
+        try:
+            with get_session() as session:
+                data_inicio = inicio + timedelta(days=i % 3000)
+                session.add(Evento(cpf_usuario=10000000000 + i % TOTAL_USUARIOS,
+                                   data_inicio=data_inicio, data_fim=data_inicio,
+                                   total_dias=1, id_tipo_ausencia=1, UF="SP",
+                                   aprovado_por=10000000000, status="pendente",
+                                   criado_em=datetime.now()))
+                session.commit()
+            contadores.somar("escritas")
+        except Exception:
+            contadores.somar("erros")
+        i += 1
+
+def medir(leitores: int, escritores: int, segundos: float, total_eventos: int) -> Contadores:
+    contadores = Contadores()
+    fim = time.perf_counter() + segundos
+    threads = [threading.Thread(target=leitor, args=(fim, total_eventos, contadores)) for _ in range(leitores)]
+    threads += [threading.Thread(target=escritor, args=(fim, contadores)) for _ in range(escritores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return contadores
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do perfil de ajuste do SQLite')
+    parser.add_argument('--eventos', '-n', type=int, default=5000, help='Eventos criados antes da medição')
+    parser.add_argument('--leitores', type=int, default=4, help='Threads de leitura')
+    parser.add_argument('--escritores', type=int, default=1, help='Threads de escrita')
+    parser.add_argument('--segundos', '-s', type=float, default=10.0, help='Duração de cada cenário')
+    args = parser.parse_args()
+
+    cenarios = (("leitura", args.leitores, 0), ("escrita", 0, args.escritores),
+                ("misto", args.leitores, args.escritores))
+
+    print(f"{'perfil':>8} | {'cenário':>8} | {'leituras/s':>10} | {'escritas/s':>10} | {'erros':>5}")
+    for nome, tuning in PERFIS:
+        os.environ['SQLITE_TUNING'] = tuning
+        with tempfile.TemporaryDirectory() as diretorio:
+            init_db(f"sqlite:///{os.path.join(diretorio, 'benchmark.db')}")
+            print(f"   {nome}: {pragmas_efetivos(models.engine)}")
+            popular_banco(args.eventos)
+            for cenario, leitores, escritores in cenarios:
+                contadores = medir(leitores, escritores, args.segundos, args.eventos)
+                print(f"{nome:>8} | {cenario:>8} | {contadores.leituras / args.segundos:>10.1f}"
+                      f" | {contadores.escritas / args.segundos:>10.1f} | {contadores.erros:>5}")
+            models.engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Importação em lote de usuários a partir de um arquivo CSV ou NDJSON
+Valida todas as linhas, confere CPFs e emails já cadastrados por conjunto,
+gera os hashes das senhas em paralelo e insere em lotes
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+# Adiciona o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+from api.database.models import init_db
+from api.database.crud import importar_usuarios, STREAM_BATCH_SIZE
+from api.database.importacao import LEITORES, FORMATO_CSV, FORMATO_NDJSON
+from api.database.senhas import pool_senhas
+
+def url_banco_padrao():
+    """MySQL quando as variáveis DB_* estão definidas (como em app.py); senão SQLite local"""
+    db_host, db_name = os.getenv('DB_HOST'), os.getenv('DB_NAME')
+    db_user, db_pass = os.getenv('DB_USER'), os.getenv('DB_PASS')
+    if all([db_host, db_name, db_user, db_pass]):
+        return f"mysql+pymysql://{db_user}:{db_pass}@{db_host}:{os.getenv('DB_PORT', '3306')}/{db_name}"
+    return None
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Importação em lote de usuários (CSV ou NDJSON)')
+    parser.add_argument('arquivo', help='Arquivo de entrada (.csv, .ndjson ou .jsonl)')
+    parser.add_argument('--formato', choices=sorted(LEITORES),
+                        help='Formato do arquivo (padrão: pela extensão)')
+    parser.add_argument('--lote', type=int, default=STREAM_BATCH_SIZE,
+                        help='Usuários por INSERT/commit')
+    parser.add_argument('--processos', type=int, default=None,
+                        help='Processos para gerar os hashes de senha (padrão: PASSWORD_HASH_WORKERS ou um por núcleo)')
+    parser.add_argument('--database-url', default=None,
+                        help='URL do banco (padrão: MySQL pelas variáveis DB_*, senão SQLite local)')
+    args = parser.parse_args()
+
+    formato = args.formato or (FORMATO_CSV if args.arquivo.lower().endswith('.csv') else FORMATO_NDJSON)
+    init_db(args.database_url or url_banco_padrao())
+    if args.processos is not None:
+        pool_senhas.redimensionar(args.processos)
+
+    inicio = time.perf_counter()
+    with open(args.arquivo, encoding='utf-8', newline='') as arquivo:
+        try:
+            resultado = importar_usuarios(LEITORES[formato](arquivo), lote=args.lote)
+        except ValueError as e:
+            print(f"❌ Arquivo inválido: {e}")
+            return 1
+    duracao = time.perf_counter() - inicio
+
+    for erro in resultado["erros"]:
+        print(json.dumps(erro, ensure_ascii=False))
+    print(f"✅ {resultado['importados']} de {resultado['total']} usuários importados em {duracao:.1f}s "
+          f"({len(resultado['erros'])} com erro)")
+    return 1 if resultado["erros"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())